@@ -0,0 +1,101 @@
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .database import dialect_insert
+
+# Rows per INSERT ... ON CONFLICT statement; 7 columns x 1000 rows stays well under
+# the bind parameter limits of both Postgres (32767) and SQLite (32766)
+BULK_SYNC_CHUNK_SIZE = 1000
+
+
+def _upsert_statement(insert, rows: List[Dict[str, Any]]):
+    stmt = insert(models.User).values(rows)
+    columns = [column for column in rows[0] if column != 'id']
+    return stmt.on_conflict_do_update(
+        index_elements=[models.User.id],
+        set_={column: stmt.excluded[column] for column in columns}
+    )
+
+
+async def bulk_upsert_users(
+    db: AsyncSession,
+    users: List[schemas.UserSync],
+    chunk_size: int = BULK_SYNC_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Insert or update users with one set-based upsert per chunk.
+
+    Each chunk is its own transaction, so a failing chunk does not undo earlier
+    ones. If a chunk's statement fails (for example a username that already
+    belongs to another id), the chunk is retried row by row inside savepoints so
+    that only the offending records are reported as errors.
+
+    Returns:
+        Per-record statuses ("inserted", "updated", "superseded" for an earlier
+        duplicate id in the same request, or "error") plus totals and throughput.
+    """
+    start = time.perf_counter()
+    insert = dialect_insert(db.get_bind().dialect.name)
+    results: List[Dict[str, Any]] = [None] * len(users)
+
+    for chunk_start in range(0, len(users), chunk_size):
+        # The last occurrence of an id wins; one statement cannot touch a row twice
+        latest: Dict[int, int] = {}
+        for index in range(chunk_start, min(chunk_start + chunk_size, len(users))):
+            previous = latest.get(users[index].id)
+            if previous is not None:
+                results[previous] = {"user_id": users[previous].id, "status": "superseded"}
+            latest[users[index].id] = index
+
+        existing = set((await db.execute(
+            select(models.User.id).where(models.User.id.in_(latest))
+        )).scalars())
+        rows = {index: users[index].dict() for index in latest.values()}
+
+        try:
+            await db.execute(_upsert_statement(insert, list(rows.values())))
+            await db.commit()
+            for user_id, index in latest.items():
+                results[index] = {
+                    "user_id": user_id,
+                    "status": "updated" if user_id in existing else "inserted"
+                }
+        except SQLAlchemyError:
+            await db.rollback()
+            for user_id, index in latest.items():
+                try:
+                    async with db.begin_nested():
+                        await db.execute(_upsert_statement(insert, [rows[index]]))
+                    results[index] = {
+                        "user_id": user_id,
+                        "status": "updated" if user_id in existing else "inserted"
+                    }
+                except SQLAlchemyError as e:
+                    results[index] = {
+                        "user_id": user_id,
+                        "status": "error",
+                        "detail": str(e.orig) if getattr(e, 'orig', None) else str(e)
+                    }
+            await db.commit()
+
+    elapsed = time.perf_counter() - start
+    counts = {"inserted": 0, "updated": 0, "superseded": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+
+    return {
+        "status": "success" if counts["error"] == 0 else "partial",
+        "total": len(users),
+        "inserted": counts["inserted"],
+        "updated": counts["updated"],
+        "superseded": counts["superseded"],
+        "failed": counts["error"],
+        "elapsed_seconds": elapsed,
+        "records_per_second": len(users) / elapsed if elapsed > 0 else None,
+        "results": results,
+    }
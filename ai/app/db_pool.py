@@ -0,0 +1,190 @@
+import bisect
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open-ended
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_settings_from_env() -> Dict[str, Any]:
+    """Connection pool settings, each overridable through the environment."""
+    return {
+        'pool_size': int(os.getenv("DB_POOL_SIZE", "5")),
+        'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        'pool_timeout': float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        'pool_pre_ping': _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+class PoolStats:
+    """
+    Counters describing connection pool usage, for sizing the pool against the
+    worker count: how long checkouts wait, how many connections are checked out
+    at once and how far into overflow the pool goes.
+    """
+
+    def __init__(self, pool_size: int = 0, max_overflow: int = 0):
+        self._lock = threading.Lock()
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.overflow = 0
+        self.peak_overflow = 0
+        self.overflow_checkouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._engine = None
+
+    def record_wait(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+
+    def record_timeout(self, seconds: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+        self.record_wait(seconds)
+
+    def _on_checkout(self, pool) -> None:
+        overflow = max(0, pool.overflow())
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out = pool.checkedout()
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+            self.overflow = overflow
+            self.peak_overflow = max(self.peak_overflow, overflow)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+
+    def _on_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def attach(self, engine) -> None:
+        """Register pool event hooks on a (sync) engine and hand the stats to its pool."""
+        self._engine = engine
+        if isinstance(engine.pool, InstrumentedAsyncPool):
+            engine.pool.stats = self
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self._on_checkout(engine.pool)
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            self._on_checkin()
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self._engine is not None:
+            # Current values come from the live pool; checkin events fire before the
+            # connection is back in the pool, so they cannot track them exactly
+            pool = self._engine.pool
+            self.checked_out = pool.checkedout()
+            self.overflow = max(0, pool.overflow())
+
+        with self._lock:
+            buckets = {
+                f"le_{bound}ms": count
+                for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)
+            }
+            buckets["gt_{}ms".format(WAIT_BUCKETS_MS[-1])] = self.wait_buckets[-1]
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'overflow': self.overflow,
+                'peak_overflow': self.peak_overflow,
+                'overflow_checkouts': self.overflow_checkouts,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'checkout_wait': {
+                    'count': self.wait_count,
+                    'mean_ms': self.wait_total / self.wait_count * 1000 if self.wait_count else 0.0,
+                    'max_ms': self.wait_max * 1000,
+                    'buckets': buckets,
+                },
+            }
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that times every checkout.
+
+    SQLAlchemy has no event before a checkout starts, so the wait is measured
+    around connect(): it covers queueing for a free connection plus, when the
+    pool grows, opening the new connection and the pre-ping.
+    """
+
+    stats: Optional[PoolStats] = None
+
+    # Log under the stock pool's name ("sqlalchemy.pool.impl.AsyncAdaptedQueuePool")
+    # rather than this module's, so echo_pool and the sqlalchemy.pool logger level
+    # govern these messages as they would for the stock pool
+    _sqla_logger_namespace = f"{AsyncAdaptedQueuePool.__module__}.{AsyncAdaptedQueuePool.__name__}"
+
+    def connect(self):
+        stats = self.stats
+        if stats is None:
+            return super().connect()
+
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            stats.record_timeout(time.perf_counter() - start)
+            raise
+        stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def engine_pool_options(url: str) -> Dict[str, Any]:
+    """create_async_engine keyword arguments for the pool of the given database URL."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite' and parsed.database in (None, '', ':memory:'):
+        # In-memory SQLite is a single shared connection (StaticPool); nothing to size
+        return {}
+    return {'poolclass': InstrumentedAsyncPool, **pool_settings_from_env()}
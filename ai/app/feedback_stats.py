@@ -0,0 +1,117 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .database import dialect_insert
+
+# Weight of the newest rating in a user's exponentially weighted mean
+RATING_EWMA_ALPHA = 0.3
+
+
+async def record_rating(
+    db: AsyncSession,
+    workout: models.WorkoutPlan,
+    rating: int,
+    previous_rating: Optional[int] = None
+) -> None:
+    """
+    Fold a workout's difficulty rating into the per-exercise and per-user aggregates.
+
+    Every counter is updated with a single INSERT ... ON CONFLICT DO UPDATE that
+    adds to the stored totals, so concurrent feedback for the same user or
+    exercise never loses an update. When a workout that was already rated is
+    rated again, the old rating is replaced rather than counted twice. The
+    caller commits, so the aggregates land in the same transaction as the
+    rating itself.
+    """
+    insert = dialect_insert(db.get_bind().dialect.name)
+    now = datetime.utcnow()
+    count = 1 if previous_rating is None else 0
+    old = previous_rating or 0
+    totals = {
+        'rating_count': count,
+        'rating_sum': rating - old,
+        'rating_sum_sq': rating * rating - old * old,
+        'updated_at': now,
+    }
+
+    # Sorted so concurrent transactions lock the rows in the same order
+    names = sorted({
+        exercise['name'] for exercise in workout.exercises or []
+        if isinstance(exercise, dict) and exercise.get('name')
+    })
+    if names:
+        stmt = insert(models.ExerciseFeedbackStats).values(
+            [{'exercise_name': name, **totals} for name in names]
+        )
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[models.ExerciseFeedbackStats.exercise_name],
+            set_=_accumulate(models.ExerciseFeedbackStats, stmt)
+        ))
+
+    if workout.user_id is not None:
+        stmt = insert(models.UserFeedbackStats).values(
+            user_id=workout.user_id, rating_ewma=float(rating), last_rating=rating, **totals
+        )
+        table = models.UserFeedbackStats
+        updates = {
+            **_accumulate(table, stmt),
+            'last_rating': stmt.excluded.last_rating,
+        }
+        if previous_rating is None:
+            # A re-rating leaves the EWMA alone: the old rating's weight depends on
+            # how many ratings followed it, so it cannot be swapped out exactly
+            updates['rating_ewma'] = (
+                table.rating_ewma * (1 - RATING_EWMA_ALPHA) + stmt.excluded.rating_ewma * RATING_EWMA_ALPHA
+            )
+        await db.execute(stmt.on_conflict_do_update(index_elements=[table.user_id], set_=updates))
+
+
+def _accumulate(table, stmt) -> Dict[str, Any]:
+    return {
+        'rating_count': table.rating_count + stmt.excluded.rating_count,
+        'rating_sum': table.rating_sum + stmt.excluded.rating_sum,
+        'rating_sum_sq': table.rating_sum_sq + stmt.excluded.rating_sum_sq,
+        'updated_at': stmt.excluded.updated_at,
+    }
+
+
+def _summarize(stats) -> Dict[str, Any]:
+    count = stats.rating_count
+    mean = stats.rating_sum / count if count else None
+    variance = max(0.0, stats.rating_sum_sq / count - mean * mean) if count else None
+    return {
+        'rating_count': count,
+        'mean_rating': mean,
+        'rating_variance': variance,
+        'rating_stddev': math.sqrt(variance) if variance is not None else None,
+        'updated_at': stats.updated_at.isoformat() if stats.updated_at else None,
+    }
+
+
+async def get_exercise_stats(db: AsyncSession, exercise_name: str) -> Optional[Dict[str, Any]]:
+    stats = (await db.execute(
+        select(models.ExerciseFeedbackStats)
+        .where(models.ExerciseFeedbackStats.exercise_name == exercise_name)
+    )).scalar_one_or_none()
+    if stats is None:
+        return None
+    return {'exercise_name': exercise_name, **_summarize(stats)}
+
+
+async def get_user_stats(db: AsyncSession, user_id: int) -> Optional[Dict[str, Any]]:
+    stats = (await db.execute(
+        select(models.UserFeedbackStats).where(models.UserFeedbackStats.user_id == user_id)
+    )).scalar_one_or_none()
+    if stats is None:
+        return None
+    return {
+        'user_id': user_id,
+        **_summarize(stats),
+        'recent_rating': stats.rating_ewma,
+        'last_rating': stats.last_rating,
+    }
@@ -0,0 +1,217 @@
+"""
+Structured, non-blocking logging.
+
+configure_logging() puts a QueueHandler on the root logger: the calling
+thread only appends the record to a bounded queue, and a QueueListener thread
+formats it and writes it to stderr. Records stay unformatted until they reach
+that thread, so a record that is filtered out or dropped costs no formatting.
+When the queue is full, records are dropped and counted instead of blocking
+the event loop.
+
+Events are logged as a name plus key/value fields:
+
+    log = get_event_logger(__name__)
+    log.info("sync_user", user_id=user.id, created=True)
+    log.sampled("generate_workout.request", fitness_goal=goal)
+
+and written as logfmt (LOG_FORMAT=json for one JSON object per line):
+
+    ts=2025-01-31T08:00:00.123Z level=info logger=app.main event=sync_user user_id=7 created=true
+
+sampled() is for high-volume events. It keeps a random fraction of them, set
+per event in LOG_SAMPLE_RATES ("generate_workout.request=0.01,sync_user=0.1")
+with LOG_SAMPLE_RATE (default 1.0) for the rest. Kept records carry a
+sample_rate field, so counts can be scaled back up.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "logfmt").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "event=rate,event=rate" into a dict; rates are clamped to [0, 1]."""
+    rates = {}
+    for item in value.split(','):
+        event, _, rate = item.strip().partition('=')
+        if event and rate:
+            rates[event] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+DEFAULT_SAMPLE_RATE = min(1.0, max(0.0, float(os.getenv("LOG_SAMPLE_RATE", "1.0"))))
+SAMPLE_RATES = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records that do not fit in the queue are counted and dropped."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats the message here, on the caller's thread; only
+        # tracebacks are rendered now (the frames would otherwise be kept alive),
+        # the message is left for the listener
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _logfmt_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)
+    if not value or any(c in value for c in ' ="\n'):
+        return json.dumps(value)
+    return value
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as logfmt or JSON lines; runs on the listener thread."""
+
+    def __init__(self, style: str = LOG_FORMAT):
+        super().__init__()
+        self.json = style == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+                  .replace('+00:00', 'Z'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        fields.update(getattr(record, 'fields', None) or {})
+        if record.exc_text:
+            fields['exception'] = record.exc_text
+        if self.json:
+            return json.dumps(fields, default=str)
+        return " ".join(f"{key}={_logfmt_value(value)}" for key, value in fields.items())
+
+
+class EventLogger:
+    """Thin wrapper over a stdlib logger for name + key/value events."""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def log(self, level: int, event: str, exc_info: Any = None, **fields: Any) -> None:
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+    def sampled(self, event: str, level: int = logging.INFO, **fields: Any) -> None:
+        """Log a high-volume event at its configured sample rate."""
+        rate = SAMPLE_RATES.get(event, DEFAULT_SAMPLE_RATE)
+        if rate <= 0.0 or not self.logger.isEnabledFor(level):
+            return
+        if rate < 1.0:
+            if random.random() >= rate:
+                return
+            fields['sample_rate'] = rate
+        self.log(level, event, **fields)
+
+
+def get_event_logger(name: str) -> EventLogger:
+    return EventLogger(logging.getLogger(name))
+
+
+_listener: Optional[QueueListener] = None
+queue_handler: Optional[DroppingQueueHandler] = None
+# Root handlers replaced by configure_logging(), put back by stop_logging()
+_previous_handlers: Optional[List[logging.Handler]] = None
+
+
+def configure_logging() -> None:
+    """Route the root logger through the queue and start the writer thread (once per process)."""
+    global _listener, queue_handler, _previous_handlers
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(StructuredFormatter())
+    queue_handler = DroppingQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    if _previous_handlers is None:
+        _previous_handlers = [handler for handler in root.handlers if not isinstance(handler, DroppingQueueHandler)]
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """
+    Write out everything queued and stop the writer thread.
+
+    The root handlers configure_logging() replaced are put back; if there were
+    none, records are written synchronously in the same format, so nothing
+    logged after shutdown is lost.
+    """
+    global _listener, _previous_handlers
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+    handlers = _previous_handlers
+    _previous_handlers = None
+    if not handlers:
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(StructuredFormatter())
+        handlers = [stream_handler]
+    logging.getLogger().handlers[:] = handlers
+
+
+def _restart_in_child() -> None:
+    # A forked worker inherits the listener object but not its thread
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
@@ -0,0 +1,196 @@
+"""
+Per-stage request timing, exported as Prometheus histograms and Server-Timing headers.
+
+Code on the hot path wraps a stage in `with stage('name'):`. The elapsed time
+goes into the app_stage_seconds histogram and, while a request is being
+served, into that request's Server-Timing header. The per-request list lives
+in a context variable, so stages run in the threadpool or inside SQLAlchemy's
+async driver are attributed to the right request.
+
+Set METRICS_ENABLED=false to turn everything off: stage() then returns a
+shared no-op context manager, and the middleware and database hooks are not
+installed.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+enabled = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """A Prometheus histogram with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(series):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+STAGE_SECONDS = Histogram(
+    "app_stage_seconds", "Time spent in each stage of request handling.", ("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time from request start to response start.", ("method", "route", "status")
+)
+
+
+class RequestTimings:
+    """Stages recorded while serving one request, in the order they finished."""
+
+    __slots__ = ('start', 'stages')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; repeated stages (e.g. several queries) are summed."""
+        totals: Dict[str, float] = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        totals['total'] = time.perf_counter() - self.start
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe((name,), seconds)
+    timings = _current.get()
+    if timings is not None:
+        timings.stages.append((name, seconds))
+
+
+class _StageTimer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NO_TIMER = nullcontext()
+
+
+def stage(name: str):
+    """Context manager timing one stage; a shared no-op when metrics are disabled."""
+    if not enabled:
+        return _NO_TIMER
+    return _StageTimer(name)
+
+
+def record_since_request_start(name: str) -> None:
+    """Record the time from the start of the current request until now, e.g. parsing and validation."""
+    if not enabled:
+        return
+    timings = _current.get()
+    if timings is not None:
+        record_stage(name, time.perf_counter() - timings.start)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times each HTTP request and adds its Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                route = scope.get('route')
+                REQUEST_SECONDS.observe(
+                    (scope['method'], getattr(route, 'path', 'unmatched'), str(message['status'])),
+                    time.perf_counter() - timings.start
+                )
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timings.server_timing().encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+
+
+def attach_db_timer(sync_engine) -> None:
+    """Time every statement executed on the engine as the 'db' stage."""
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_stage('db', time.perf_counter() - conn.info['query_start'].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_start'):
+            connection.info['query_start'].pop()
+
+
+def render() -> str:
+    return "\n".join(STAGE_SECONDS.render() + REQUEST_SECONDS.render()) + "\n"
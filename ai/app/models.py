@@ -43,11 +43,34 @@ class WorkoutPlan(Base):
     difficulty = Column(Float)
     completed = Column(Boolean, default=False)
     feedback = Column(JSON, nullable=True)
+    difficulty_rating = Column(Integer, nullable=True)  # 1-5 scale, from workout feedback
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     
     user = relationship("User", back_populates="workout_plans")
 
+class ExerciseFeedbackStats(Base):
+    __tablename__ = "exercise_feedback_stats"
+    
+    # Running totals of the difficulty ratings of plans containing the exercise;
+    # mean and variance are derived from count, sum and sum of squares
+    exercise_name = Column(String, primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_sum_sq = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class UserFeedbackStats(Base):
+    __tablename__ = "user_feedback_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_sum_sq = Column(Integer, nullable=False, default=0)
+    rating_ewma = Column(Float)  # Exponentially weighted mean, tracks the recent trend
+    last_rating = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class MenstrualCycleLog(Base):
     __tablename__ = "menstrual_cycle_logs"
     
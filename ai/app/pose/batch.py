@@ -0,0 +1,250 @@
+"""
+Offline re-scoring of recorded pose sessions.
+
+A session is an .npz file holding:
+    keypoints   (F, 33, 3) x, y, score per BlazePose keypoint
+    timestamps  (F,) frame times in milliseconds (optional)
+    exercise    exercise id such as "push-ups" (optional, else --exercise)
+
+Usage (from the ai/ directory):
+    python -m app.pose.batch recordings/*.npz --workers 4 --ranges ranges.json --output scores.jsonl
+
+--ranges takes {"<exercise>": {"<check>": {"min": .., "max": ..}}} overrides, so
+sessions can be re-scored against changed form-check ranges. One JSON summary
+per session is written, in input order.
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .form_checks import FORM_CHECKS, KEYPOINTS, CompiledExercise
+from .kernels import in_range, joint_angles, keypoints_visible, streak_reps
+from .session import REP_STREAK_FRAMES
+
+# Frame rate assumed when a session has no timestamps
+DEFAULT_FPS = 30.0
+# A rep is a swing of the primary angle of at least this many degrees...
+REP_MIN_PROMINENCE = 30.0
+# ...and reps are at least this far apart
+REP_MIN_SECONDS = 0.5
+# Moving-average width used to smooth the angle series before peak detection
+SMOOTHING_SECONDS = 0.2
+
+
+def write_session(path: str, keypoints: np.ndarray, timestamps: Optional[np.ndarray] = None,
+                  exercise: Optional[str] = None) -> None:
+    """Save a session uncompressed, so load_session can memory-map it."""
+    arrays = {'keypoints': np.ascontiguousarray(keypoints, dtype=np.float32)}
+    if timestamps is not None:
+        arrays['timestamps'] = np.asarray(timestamps, dtype=np.float64)
+    if exercise is not None:
+        arrays['exercise'] = np.array(exercise)
+    np.savez(path, **arrays)
+
+
+def _mmap_member(path: str, info: zipfile.ZipInfo) -> Optional[np.ndarray]:
+    """Memory-map a stored (uncompressed) .npy member of a zip archive, or None if it cannot be."""
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, 'rb') as f:
+        # Local file header: 30 fixed bytes, then the file name and extra field
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+        data_offset = info.header_offset + 30 + int(name_length) + int(extra_length)
+        f.seek(data_offset)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            return None
+        offset = f.tell()
+    if dtype.hasobject or not shape:
+        return None
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+def load_session(path: str) -> Dict[str, Any]:
+    """Load a session, memory-mapping its keypoints when the archive is uncompressed."""
+    with zipfile.ZipFile(path) as archive:
+        members = {info.filename: info for info in archive.infolist()}
+        keypoints = _mmap_member(path, members['keypoints.npy']) if 'keypoints.npy' in members else None
+
+    with np.load(path, allow_pickle=False) as data:
+        if keypoints is None:
+            keypoints = data['keypoints']
+        timestamps = data['timestamps'] if 'timestamps' in data.files else None
+        exercise = str(data['exercise']) if 'exercise' in data.files else None
+
+    if keypoints.ndim != 3 or keypoints.shape[1:] != (len(KEYPOINTS), 3):
+        raise ValueError(f"{path}: keypoints must have shape (frames, {len(KEYPOINTS)}, 3)")
+    return {'keypoints': keypoints, 'timestamps': timestamps, 'exercise': exercise}
+
+
+def compile_with_ranges(overrides: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None) -> Dict[str, CompiledExercise]:
+    """Compile every exercise, replacing the ranges of the checks named in overrides."""
+    specs = copy.deepcopy(FORM_CHECKS)
+    for exercise_id, checks in (overrides or {}).items():
+        if exercise_id not in specs:
+            raise ValueError(f"Unknown exercise in range overrides: {exercise_id}")
+        by_name = {check['name']: check for check in specs[exercise_id]['checks']}
+        for check_name, check_range in checks.items():
+            if check_name not in by_name:
+                raise ValueError(f"Unknown check {check_name} for {exercise_id}")
+            by_name[check_name]['range'].update(check_range)
+    return {exercise_id: CompiledExercise(exercise_id, spec) for exercise_id, spec in specs.items()}
+
+
+def _fill_gaps(series: np.ndarray) -> np.ndarray:
+    """Linearly interpolate NaN samples (frames where the joint was not tracked)."""
+    missing = np.isnan(series)
+    if missing.all() or not missing.any():
+        return series
+    index = np.arange(len(series))
+    filled = series.copy()
+    filled[missing] = np.interp(index[missing], index[~missing], series[~missing])
+    return filled
+
+
+def detect_reps(angle: np.ndarray, fps: float) -> np.ndarray:
+    """
+    Frame indices of rep turning points in a joint angle series.
+
+    The series is gap-filled and smoothed, then each rep is a valley (the joint
+    at its most flexed) with at least REP_MIN_PROMINENCE degrees of swing,
+    at least REP_MIN_SECONDS after the previous one.
+    """
+    from scipy.signal import find_peaks
+
+    series = _fill_gaps(angle.astype(np.float64))
+    if np.isnan(series).all() or len(series) < 3:
+        return np.array([], dtype=np.intp)
+    width = max(1, int(round(SMOOTHING_SECONDS * fps)))
+    if width > 1:
+        series = np.convolve(np.pad(series, (width // 2, width - 1 - width // 2), mode='edge'),
+                             np.ones(width) / width, mode='valid')
+    valleys, _ = find_peaks(-series, prominence=REP_MIN_PROMINENCE,
+                            distance=max(1, int(REP_MIN_SECONDS * fps)))
+    return valleys
+
+
+def analyze_session(keypoints: np.ndarray, timestamps: Optional[np.ndarray],
+                    exercise: CompiledExercise) -> Dict[str, Any]:
+    """Score one session: all joint angles in one pass, range checks, and rep detection."""
+    frame_count = len(keypoints)
+    angles = joint_angles(keypoints, exercise.a, exercise.b, exercise.c)
+    checks_ok = in_range(angles, exercise.low, exercise.high)
+    visible = keypoints_visible(keypoints, exercise.required)
+    good = visible & checks_ok.all(axis=1)
+
+    if timestamps is not None and frame_count > 1:
+        duration = float(timestamps[-1] - timestamps[0]) / 1000.0
+        fps = (frame_count - 1) / duration if duration > 0 else DEFAULT_FPS
+    else:
+        fps = DEFAULT_FPS
+        duration = frame_count / fps
+
+    # The first check of an exercise follows its main movement (elbow, knee, back...)
+    rep_frames = detect_reps(angles[:, 0], fps) if len(exercise.check_names) else np.array([], dtype=np.intp)
+    streak, _ = streak_reps(good, 0, REP_STREAK_FRAMES)
+
+    with np.errstate(invalid='ignore'):
+        checks = {}
+        for i, name in enumerate(exercise.check_names):
+            column = angles[visible, i]
+            tracked = column[~np.isnan(column)]
+            checks[name] = {
+                'inRange': float(checks_ok[visible, i].mean()) if visible.any() else None,
+                'meanAngle': float(tracked.mean()) if len(tracked) else None,
+                'minAngle': float(tracked.min()) if len(tracked) else None,
+                'maxAngle': float(tracked.max()) if len(tracked) else None,
+            }
+
+    return {
+        'exercise': exercise.id,
+        'frames': frame_count,
+        'durationSeconds': duration,
+        'fps': fps,
+        'visibleFraction': float(visible.mean()) if frame_count else None,
+        'goodFormFraction': float(good.mean()) if frame_count else None,
+        'reps': len(rep_frames),
+        'goodReps': int(good[rep_frames].sum()),
+        'streakReps': streak,
+        'repFrames': rep_frames.tolist(),
+        'checks': checks,
+    }
+
+
+def score_file(path: str, exercises: Dict[str, CompiledExercise], default_exercise: Optional[str] = None) -> Dict[str, Any]:
+    """Load and score one session file; errors are reported in the summary instead of raised."""
+    try:
+        session = load_session(path)
+        exercise_id = session['exercise'] or default_exercise
+        if exercise_id not in exercises:
+            raise ValueError(f"unknown or missing exercise {exercise_id!r}")
+        summary = analyze_session(session['keypoints'], session['timestamps'], exercises[exercise_id])
+        return {'path': path, **summary}
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+
+def score_files(paths: Iterable[str], workers: Optional[int] = None,
+                overrides: Optional[Dict[str, Any]] = None,
+                default_exercise: Optional[str] = None) -> Iterable[Dict[str, Any]]:
+    """
+    Score sessions across a process pool, yielding summaries in input order.
+
+    Workers receive only file paths and memory-map the sessions themselves, so
+    keypoint arrays are never pickled between processes.
+    """
+    exercises = compile_with_ranges(overrides)
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    score = partial(score_file, exercises=exercises, default_exercise=default_exercise)
+    if workers == 1 or len(paths) <= 1:
+        yield from map(score, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Several sessions per task amortise the inter-process round trip
+        chunksize = max(1, len(paths) // (workers * 4))
+        yield from pool.map(score, paths, chunksize=chunksize)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score recorded pose sessions")
+    parser.add_argument('paths', nargs='+', help=".npz session files")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument('--ranges', help="JSON file with form-check range overrides")
+    parser.add_argument('--exercise', help="exercise id for sessions that do not store one")
+    parser.add_argument('--output', help="JSON lines output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    overrides = None
+    if args.ranges:
+        with open(args.ranges) as f:
+            overrides = json.load(f)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    failures = 0
+    try:
+        for summary in score_files(args.paths, args.workers, overrides, args.exercise):
+            failures += 'error' in summary
+            output.write(json.dumps(summary) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# BlazePose keypoints in model output order; frames sent as plain arrays use this order
+KEYPOINTS = (
+    'nose', 'left_eye_inner', 'left_eye', 'left_eye_outer', 'right_eye_inner',
+    'right_eye', 'right_eye_outer', 'left_ear', 'right_ear', 'mouth_left',
+    'mouth_right', 'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_pinky', 'right_pinky', 'left_index',
+    'right_index', 'left_thumb', 'right_thumb', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle', 'left_heel',
+    'right_heel', 'left_foot_index', 'right_foot_index',
+)
+KEYPOINT_INDEX = {name: index for index, name in enumerate(KEYPOINTS)}
+
+# Minimum detection score for a required keypoint to count as visible
+MIN_KEYPOINT_SCORE = 0.5
+
+# Same checks as exerciseFormChecks in frontend/src/Components/Workout/Posture.jsx
+FORM_CHECKS: Dict[str, Dict[str, Any]] = {
+    'neck-posture': {
+        'name': 'Neck Posture Check',
+        'type': 'test',
+        'keypoints': ['nose', 'left_ear', 'right_ear', 'left_eye', 'right_eye', 'left_shoulder', 'right_shoulder'],
+        'targetReps': 5,
+        'checks': [
+            {'name': 'headTilt', 'points': ['left_ear', 'nose', 'right_ear'],
+             'range': {'min': 170, 'max': 190}, 'message': "Keep your head level - don't tilt left or right"},
+            {'name': 'neckForward', 'points': ['nose', 'left_ear', 'left_shoulder'],
+             'range': {'min': 70, 'max': 100}, 'message': "Keep your head back - don't lean forward"},
+            {'name': 'shoulderLevel', 'points': ['left_shoulder', 'right_shoulder', 'nose'],
+             'range': {'min': 170, 'max': 190}, 'message': "Keep your shoulders level"},
+        ]
+    },
+    'push-ups': {
+        'name': 'Push-ups',
+        'type': 'strength',
+        'keypoints': ['left_shoulder', 'left_elbow', 'left_wrist', 'left_hip', 'left_knee'],
+        'targetReps': 10,
+        'checks': [
+            {'name': 'elbowAngle', 'points': ['left_shoulder', 'left_elbow', 'left_wrist'],
+             'range': {'min': 85, 'max': 95}, 'message': "Keep elbows at 90 degrees"},
+            {'name': 'backAngle', 'points': ['left_shoulder', 'left_hip', 'left_knee'],
+             'range': {'min': 160, 'max': 180}, 'message': "Keep your back straight"},
+        ]
+    },
+    'dumbbell-rows': {
+        'name': 'Dumbbell Rows',
+        'type': 'strength',
+        'keypoints': ['left_shoulder', 'left_elbow', 'left_wrist', 'left_hip'],
+        'targetReps': 12,
+        'checks': [
+            {'name': 'backAngle', 'points': ['left_shoulder', 'left_hip', 'left_knee'],
+             'range': {'min': 150, 'max': 170}, 'message': "Keep your back straight, slight bend is ok"},
+            {'name': 'elbowTuck', 'points': ['left_shoulder', 'left_elbow', 'left_wrist'],
+             'range': {'min': 0, 'max': 45}, 'message': "Keep your elbow close to your body"},
+        ]
+    },
+    'goblet-squats': {
+        'name': 'Goblet Squats',
+        'type': 'strength',
+        'keypoints': ['left_hip', 'left_knee', 'left_ankle', 'left_shoulder'],
+        'targetReps': 12,
+        'checks': [
+            {'name': 'kneeAngle', 'points': ['left_hip', 'left_knee', 'left_ankle'],
+             'range': {'min': 85, 'max': 95}, 'message': "Lower until thighs are parallel to ground"},
+            {'name': 'backAngle', 'points': ['left_shoulder', 'left_hip', 'left_knee'],
+             'range': {'min': 150, 'max': 180}, 'message': "Keep your back straight, chest up"},
+        ]
+    },
+    'bodyweight-lunges': {
+        'name': 'Bodyweight Lunges',
+        'type': 'strength',
+        'keypoints': ['left_hip', 'left_knee', 'left_ankle', 'right_hip', 'right_knee', 'right_ankle'],
+        'targetReps': 12,
+        'checks': [
+            {'name': 'frontKneeAngle', 'points': ['left_hip', 'left_knee', 'left_ankle'],
+             'range': {'min': 85, 'max': 95}, 'message': "Front knee should be at 90 degrees"},
+            {'name': 'backKneeAngle', 'points': ['right_hip', 'right_knee', 'right_ankle'],
+             'range': {'min': 85, 'max': 95}, 'message': "Back knee should be at 90 degrees"},
+        ]
+    },
+    'barbell-deadlifts': {
+        'name': 'Barbell Deadlifts',
+        'type': 'strength',
+        'keypoints': ['left_shoulder', 'left_hip', 'left_knee', 'left_ankle'],
+        'targetReps': 8,
+        'checks': [
+            {'name': 'backAngle', 'points': ['left_shoulder', 'left_hip', 'left_knee'],
+             'range': {'min': 160, 'max': 180}, 'message': "Keep your back straight throughout the movement"},
+            {'name': 'hipHinge', 'points': ['left_shoulder', 'left_hip', 'left_ankle'],
+             'range': {'min': 130, 'max': 160}, 'message': "Hinge at your hips, push them back"},
+        ]
+    },
+    'resistance-band-rows': {
+        'name': 'Light Resistance Band Rows',
+        'type': 'strength',
+        'keypoints': ['left_shoulder', 'left_elbow', 'left_wrist', 'left_hip'],
+        'targetReps': 15,
+        'checks': [
+            {'name': 'elbowAngle', 'points': ['left_shoulder', 'left_elbow', 'left_wrist'],
+             'range': {'min': 85, 'max': 95}, 'message': "Pull elbows back to 90 degrees"},
+            {'name': 'shoulderAlignment', 'points': ['left_shoulder', 'right_shoulder'],
+             'range': {'min': 170, 'max': 180}, 'message': "Keep shoulders level and back"},
+        ]
+    },
+    'jump-rope': {
+        'name': 'Jump Rope',
+        'type': 'cardio',
+        'keypoints': ['left_ankle', 'left_knee', 'left_hip', 'nose'],
+        'targetDuration': 60,
+        'checks': [
+            {'name': 'jumpHeight', 'points': ['left_ankle', 'left_knee'],
+             'range': {'min': 10, 'max': 20}, 'message': "Small, controlled jumps"},
+            {'name': 'posture', 'points': ['nose', 'left_hip', 'left_ankle'],
+             'range': {'min': 170, 'max': 180}, 'message': "Keep your body upright"},
+        ]
+    },
+    'hiit-intervals': {
+        'name': 'HIIT Intervals',
+        'type': 'cardio',
+        'keypoints': ['left_ankle', 'left_knee', 'left_hip', 'left_shoulder', 'nose'],
+        'targetDuration': 30,
+        'checks': [
+            {'name': 'fullBodyAlignment', 'points': ['nose', 'left_shoulder', 'left_hip', 'left_knee', 'left_ankle'],
+             'range': {'min': 160, 'max': 180}, 'message': "Maintain proper form during high-intensity movements"},
+        ]
+    },
+    'yoga-flow': {
+        'name': 'Yoga Flow',
+        'type': 'flexibility',
+        'keypoints': ['left_ankle', 'left_knee', 'left_hip', 'left_shoulder', 'left_wrist', 'nose'],
+        'targetDuration': 300,
+        'checks': [
+            {'name': 'alignment', 'points': ['left_shoulder', 'left_hip', 'left_ankle'],
+             'range': {'min': 160, 'max': 180}, 'message': "Keep your body aligned in poses"},
+            {'name': 'balance', 'points': ['nose', 'left_hip', 'left_ankle'],
+             'range': {'min': 170, 'max': 180}, 'message': "Maintain balance and stability"},
+        ]
+    },
+    'static-stretching': {
+        'name': 'Static Stretching',
+        'type': 'flexibility',
+        'keypoints': ['left_ankle', 'left_knee', 'left_hip', 'left_shoulder'],
+        'targetDuration': 30,
+        'checks': [
+            {'name': 'stretchAlignment', 'points': ['left_shoulder', 'left_hip', 'left_knee'],
+             'range': {'min': 150, 'max': 180}, 'message': "Maintain proper alignment during stretches"},
+        ]
+    },
+    'pilates': {
+        'name': 'Pilates',
+        'type': 'flexibility',
+        'keypoints': ['left_ankle', 'left_knee', 'left_hip', 'left_shoulder', 'nose'],
+        'targetDuration': 300,
+        'checks': [
+            {'name': 'coreAlignment', 'points': ['left_shoulder', 'left_hip', 'left_knee'],
+             'range': {'min': 160, 'max': 180}, 'message': "Keep your core engaged and spine neutral"},
+        ]
+    },
+}
+
+
+class CompiledExercise:
+    """
+    Index arrays for one exercise's form checks, ready for the angle kernels.
+
+    Like calculateAngle in the frontend, a check measures the angle at its second
+    point between the first and third; extra points are ignored and checks with
+    fewer than three points cannot be evaluated and are skipped.
+    """
+
+    def __init__(self, exercise_id: str, spec: Dict[str, Any]):
+        self.id = exercise_id
+        self.name = spec['name']
+        self.type = spec['type']
+        self.target_reps: Optional[int] = spec.get('targetReps')
+        self.target_duration: Optional[float] = spec.get('targetDuration')
+        self.required = np.array([KEYPOINT_INDEX[name] for name in spec['keypoints']], dtype=np.intp)
+
+        checks = [check for check in spec['checks'] if len(check['points']) >= 3]
+        self.check_names: List[str] = [check['name'] for check in checks]
+        self.messages: List[str] = [check['message'] for check in checks]
+        self.a = np.array([KEYPOINT_INDEX[check['points'][0]] for check in checks], dtype=np.intp)
+        self.b = np.array([KEYPOINT_INDEX[check['points'][1]] for check in checks], dtype=np.intp)
+        self.c = np.array([KEYPOINT_INDEX[check['points'][2]] for check in checks], dtype=np.intp)
+        self.low = np.array([check['range']['min'] for check in checks], dtype=np.float64)
+        self.high = np.array([check['range']['max'] for check in checks], dtype=np.float64)
+
+        # The per-frame path reads only the keypoints in use, so checks are re-indexed into them
+        self.used = np.unique(np.concatenate((self.required, self.a, self.b, self.c)))
+        position = {index: i for i, index in enumerate(self.used.tolist())}
+        self.frame_required: List[int] = [position[index] for index in self.required.tolist()]
+        self.frame_checks: List[Tuple[int, int, int, float, float]] = [
+            (position[a], position[b], position[c], low, high)
+            for a, b, c, low, high in zip(
+                self.a.tolist(), self.b.tolist(), self.c.tolist(), self.low.tolist(), self.high.tolist()
+            )
+        ]
+
+
+COMPILED_EXERCISES = {exercise_id: CompiledExercise(exercise_id, spec) for exercise_id, spec in FORM_CHECKS.items()}
+
+
+def get_exercise(exercise_id: str) -> Optional[CompiledExercise]:
+    """Look up an exercise by id, normalised the way the frontend route does ("Push Ups" -> "push-ups")."""
+    return COMPILED_EXERCISES.get('-'.join(exercise_id.lower().split()))
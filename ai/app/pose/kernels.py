@@ -0,0 +1,120 @@
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .form_checks import MIN_KEYPOINT_SCORE
+
+
+def joint_angles(frames: np.ndarray, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Angle in degrees at keypoint b between a and c, for every frame and check.
+
+    Same formula as calculateAngle in the frontend: the difference of the two
+    atan2 bearings, folded into [0, 180].
+
+    Args:
+        frames: (F, K, 3) array of x, y, score per keypoint
+        a, b, c: (C,) keypoint indices, one entry per check
+
+    Returns:
+        (F, C) array of angles; NaN where a keypoint has no coordinates
+    """
+    xy = frames[..., :2]
+    pa, pb, pc = xy[:, a], xy[:, b], xy[:, c]
+    bc = pc - pb
+    ba = pa - pb
+    radians = np.arctan2(bc[..., 1], bc[..., 0]) - np.arctan2(ba[..., 1], ba[..., 0])
+    angles = np.abs(np.degrees(radians))
+    return np.where(angles > 180.0, 360.0 - angles, angles)
+
+
+def keypoints_visible(frames: np.ndarray, required: np.ndarray, min_score: float = MIN_KEYPOINT_SCORE) -> np.ndarray:
+    """(F,) mask of frames where every required keypoint reaches min_score."""
+    return np.all(frames[:, required, 2] >= min_score, axis=1)
+
+
+def in_range(angles: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """(F, C) mask of angles inside their check's inclusive range; NaN is out of range."""
+    return (angles >= low) & (angles <= high)
+
+
+def streak_reps(good: np.ndarray, streak: int, streak_frames: int):
+    """
+    Count reps the way the frontend does: one rep per `streak_frames` consecutive
+    good-form frames, with the streak reset by any bad frame.
+
+    Works over runs of equal values rather than frame by frame.
+
+    Returns:
+        Tuple of (reps counted in this window, streak carried into the next one)
+    """
+    if not len(good):
+        return 0, streak
+    boundaries = np.flatnonzero(np.diff(good.astype(np.int8))) + 1
+    starts = np.concatenate(([0], boundaries))
+    lengths = np.diff(np.concatenate((starts, [len(good)])))
+
+    reps = 0
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        if good[start]:
+            total = streak + length
+            reps += total // streak_frames
+            streak = total % streak_frames
+        else:
+            streak = 0
+    return reps, streak
+
+
+def check_frames(
+    frames: Sequence[Sequence[Sequence[float]]],
+    checks: Sequence[Tuple[int, int, int, float, float]],
+    required: Sequence[int],
+    min_score: float = MIN_KEYPOINT_SCORE
+) -> Tuple[List[List[float]], List[List[bool]], List[bool]]:
+    """
+    joint_angles, in_range and keypoints_visible for a few frames, one frame at a time.
+
+    For a window of a handful of frames the per-call overhead of the array
+    kernels exceeds the work itself; plain float arithmetic on nested lists is
+    faster there and gives the same results.
+
+    Args:
+        frames: [frame][keypoint][x, y, score] nested lists
+        checks: (a, b, c, low, high) per check, indexing into the keypoints
+        required: keypoints that must reach min_score
+
+    Returns:
+        Per frame: the check angles, the in-range flags and the visibility flag
+    """
+    atan2, degrees = math.atan2, math.degrees
+    angles, checks_ok, visible = [], [], []
+    for frame in frames:
+        frame_angles, frame_ok = [], []
+        for a, b, c, low, high in checks:
+            ax, ay = frame[a][0], frame[a][1]
+            bx, by = frame[b][0], frame[b][1]
+            cx, cy = frame[c][0], frame[c][1]
+            angle = abs(degrees(atan2(cy - by, cx - bx) - atan2(ay - by, ax - bx)))
+            if angle > 180.0:
+                angle = 360.0 - angle
+            frame_angles.append(angle)
+            frame_ok.append(low <= angle <= high)
+        angles.append(frame_angles)
+        checks_ok.append(frame_ok)
+        visible.append(all(frame[index][2] >= min_score for index in required))
+    return angles, checks_ok, visible
+
+
+def streak_reps_per_frame(good: Sequence[bool], streak: int, streak_frames: int):
+    """streak_reps for a few frames, stepping frame by frame."""
+    reps = 0
+    for frame_good in good:
+        if frame_good:
+            streak += 1
+            if streak == streak_frames:
+                reps += 1
+                streak = 0
+        else:
+            streak = 0
+    return reps, streak
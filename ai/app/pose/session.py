@@ -0,0 +1,199 @@
+import math
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .form_checks import KEYPOINT_INDEX, KEYPOINTS, CompiledExercise
+from .kernels import check_frames, in_range, joint_angles, keypoints_visible, streak_reps, streak_reps_per_frame
+
+# Frames analysed together; a client that keeps up gets a verdict per message,
+# a lagging connection is caught up in windows of this size
+POSE_WINDOW_FRAMES = int(os.getenv("POSE_WINDOW_FRAMES", "8"))
+# Windows up to this many frames are checked frame by frame; NumPy's per-call
+# overhead only pays off on larger ones (see benchmarks/bench_pose.py)
+POSE_SCALAR_MAX_FRAMES = int(os.getenv("POSE_SCALAR_MAX_FRAMES", "16"))
+# Frames queued per connection before the oldest are dropped
+POSE_MAX_PENDING_FRAMES = int(os.getenv("POSE_MAX_PENDING_FRAMES", "64"))
+# Consecutive good-form frames per rep, as in the frontend
+REP_STREAK_FRAMES = 30
+
+
+def parse_frame(keypoints: Any) -> np.ndarray:
+    """
+    Convert one frame of keypoints into a (K, 3) array of x, y, score.
+
+    Accepts either the pose-detection output (a list of {name, x, y, score}
+    objects) or a list of [x, y, score] triples in BlazePose keypoint order.
+    Missing keypoints get NaN coordinates and score 0.
+    """
+    if not isinstance(keypoints, list):
+        raise ValueError("keypoints must be a list")
+
+    frame = np.full((len(KEYPOINTS), 3), np.nan)
+    frame[:, 2] = 0.0
+    if keypoints and isinstance(keypoints[0], dict):
+        if not all(isinstance(keypoint, dict) for keypoint in keypoints):
+            raise ValueError("keypoints must be all objects or all [x, y, score] triples")
+        indices, rows = [], []
+        for keypoint in keypoints:
+            index = KEYPOINT_INDEX.get(keypoint.get('name'))
+            if index is not None:
+                indices.append(index)
+                rows.append((keypoint.get('x'), keypoint.get('y'), keypoint.get('score', 0.0)))
+        if rows:
+            frame[indices] = np.array(rows, dtype=np.float64)
+    else:
+        if len(keypoints) > len(KEYPOINTS):
+            raise ValueError(f"expected at most {len(KEYPOINTS)} keypoints")
+        frame[:len(keypoints)] = np.array(keypoints, dtype=np.float64).reshape(len(keypoints), 3)
+    return frame
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """A frame's "t" in milliseconds, or None when the client sent none."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("t must be a number of milliseconds")
+    return float(value)
+
+
+class FrameBuffer:
+    """
+    Bounded queue of parsed frames for one connection.
+
+    When the analysis falls behind, the oldest frames are dropped: a live form
+    check is only useful for the current pose, and memory per connection stays
+    fixed no matter how fast the client sends.
+    """
+
+    def __init__(self, max_frames: int = POSE_MAX_PENDING_FRAMES, window: int = POSE_WINDOW_FRAMES):
+        self._frames: Deque[Tuple[np.ndarray, Optional[float]]] = deque(maxlen=max_frames)
+        self._window = np.empty((window, len(KEYPOINTS), 3))
+        self._timestamps = np.empty(window)
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def append(self, frame: np.ndarray, timestamp: Optional[float]) -> None:
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+        self._frames.append((frame, timestamp))
+
+    def take(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Pop up to one window of frames, oldest first, as (F, K, 3) and (F,) views."""
+        count = min(len(self._frames), len(self._window))
+        for i in range(count):
+            frame, timestamp = self._frames.popleft()
+            self._window[i] = frame
+            self._timestamps[i] = np.nan if timestamp is None else timestamp
+        return self._window[:count], self._timestamps[:count]
+
+
+class PoseSession:
+    """Running form-check state of one exercise stream: reps, streak and elapsed time."""
+
+    def __init__(
+        self,
+        exercise: CompiledExercise,
+        streak_frames: int = REP_STREAK_FRAMES,
+        scalar_max_frames: int = POSE_SCALAR_MAX_FRAMES
+    ):
+        self.exercise = exercise
+        self.streak_frames = streak_frames
+        self.scalar_max_frames = scalar_max_frames
+        self.reps = 0
+        self.streak = 0
+        self.frames = 0
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> Optional[float]:
+        if self.first_timestamp is None:
+            return None
+        return (self.last_timestamp - self.first_timestamp) / 1000.0
+
+    @property
+    def completed(self) -> bool:
+        exercise = self.exercise
+        if exercise.target_reps is not None and self.reps >= exercise.target_reps:
+            return True
+        elapsed = self.elapsed_seconds
+        return exercise.target_duration is not None and elapsed is not None and elapsed >= exercise.target_duration
+
+    def analyze(self, frames: np.ndarray, timestamps: np.ndarray) -> Dict[str, Any]:
+        """
+        Range-check a window of frames and advance the rep count.
+
+        Args:
+            frames: (F, K, 3) keypoints
+            timestamps: (F,) frame times in milliseconds, NaN if not sent
+
+        Returns:
+            Totals so far plus the verdict for the newest frame in the window
+        """
+        exercise = self.exercise
+        if len(frames) <= self.scalar_max_frames:
+            angles, checks_ok, visible = check_frames(
+                frames.take(exercise.used, axis=1).tolist(), exercise.frame_checks, exercise.frame_required
+            )
+            good = [frame_visible and all(frame_ok) for frame_visible, frame_ok in zip(visible, checks_ok)]
+            reps, self.streak = streak_reps_per_frame(good, self.streak, self.streak_frames)
+            good_frames = sum(good)
+            latest = angles[-1], checks_ok[-1], visible[-1]
+        else:
+            angles = joint_angles(frames, exercise.a, exercise.b, exercise.c)
+            checks_ok = in_range(angles, exercise.low, exercise.high)
+            visible = keypoints_visible(frames, exercise.required)
+            good = visible & checks_ok.all(axis=1)
+            reps, self.streak = streak_reps(good, self.streak, self.streak_frames)
+            good_frames = int(good.sum())
+            latest = angles[-1].tolist(), checks_ok[-1].tolist(), bool(visible[-1])
+        self.reps += reps
+        self.frames += len(frames)
+
+        known = [timestamp for timestamp in timestamps.tolist() if not math.isnan(timestamp)]
+        if known:
+            if self.first_timestamp is None:
+                self.first_timestamp = known[0]
+            self.last_timestamp = known[-1]
+
+        return {
+            'frames': len(frames),
+            'goodFrames': good_frames,
+            'totalFrames': self.frames,
+            'reps': self.reps,
+            'streak': self.streak,
+            'elapsedSeconds': self.elapsed_seconds,
+            'completed': self.completed,
+            'latest': self._verdict(*latest, float(timestamps[-1])),
+        }
+
+    def _verdict(self, angles: List[float], checks_ok: List[bool], visible: bool, timestamp: float) -> Dict[str, Any]:
+        exercise = self.exercise
+        failed = [index for index, ok in enumerate(checks_ok) if not ok]
+        if self.completed:
+            message, kind = "Exercise completed! Great job!", 'success'
+        elif not visible:
+            message, kind = "Please ensure your full body is visible", 'warning'
+        elif failed:
+            message, kind = ". ".join(exercise.messages[i] for i in failed), 'warning'
+        else:
+            message, kind = "Good form! Keep going!", 'success'
+
+        return {
+            't': None if math.isnan(timestamp) else timestamp,
+            'visible': visible,
+            'goodForm': visible and not failed,
+            'angles': {
+                name: None if math.isnan(angle) else round(angle, 1)
+                for name, angle in zip(exercise.check_names, angles)
+            },
+            'failedChecks': [exercise.check_names[i] for i in failed],
+            'message': message,
+            'type': kind,
+        }
@@ -0,0 +1,156 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .records import ExerciseRecord
+
+PHASES = ('menstrual', 'follicular', 'ovulation', 'luteal')
+
+# Bits per bitmask word; a vocabulary of V values takes ceil(V / 64) words per exercise
+WORD_BITS = 64
+
+
+class ExerciseCatalog:
+    """
+    Struct-of-arrays view of the exercise library.
+
+    Numeric attributes live in NumPy columns, and the set-valued attributes
+    (phase, equipment, target muscle, type) are stored as bitmasks against a
+    per-field vocabulary: an (exercises, words) uint64 array, with as many
+    64-bit words as the vocabulary needs. Filters are evaluated as vectorised
+    mask operations over all rows instead of Python scans over lists of dicts.
+
+    Row i of every column describes records[i].
+    """
+
+    def __init__(self, exercises: List[ExerciseRecord], columns: Optional[Dict[str, np.ndarray]] = None):
+        """
+        Args:
+            exercises: Catalog records, in row order
+            columns: Precomputed columns (e.g. memory-mapped from a preload bundle);
+                used instead of recomputing when their ids match the records
+        """
+        self.records = list(exercises)
+        count = len(self.records)
+
+        self.phases = self._build_vocabulary(PHASES, (ex.get('suitable_for_phases', []) for ex in self.records))
+        self.types = self._build_vocabulary((), ([ex.get('type', 'other')] for ex in self.records))
+        self.equipment = self._build_vocabulary((), (ex.get('equipment_needed', []) for ex in self.records))
+        self.muscles = self._build_vocabulary((), (ex.get('target_muscles', []) for ex in self.records))
+
+        self.ids = np.array([ex['id'] for ex in self.records], dtype=np.int64)
+        self.preloaded = columns is not None and np.array_equal(columns['ids'], self.ids)
+        if self.preloaded:
+            for name, column in columns.items():
+                setattr(self, name, column)
+            return
+
+        self.difficulty = np.array([ex.get('difficulty', 3) for ex in self.records], dtype=np.int8)
+        self.cardio_intensity = np.array([ex.get('cardio_intensity', 1) for ex in self.records], dtype=np.int8)
+        self.strength_intensity = np.array([ex.get('strength_intensity', 1) for ex in self.records], dtype=np.int8)
+        self.muscle_count = np.array([len(ex.get('target_muscles', [])) for ex in self.records], dtype=np.int16)
+        self.equipment_count = np.array([len(ex.get('equipment_needed', [])) for ex in self.records], dtype=np.int16)
+        # Filled in by the recommender once its difficulty model is available
+        self.predicted_difficulty = np.zeros(count, dtype=np.int8)
+
+        self.phase_bits = self._encode(self.phases, (ex.get('suitable_for_phases', []) for ex in self.records))
+        self.type_bits = self._encode(self.types, ([ex.get('type', 'other')] for ex in self.records))
+        self.equipment_bits = self._encode(self.equipment, (ex.get('equipment_needed', []) for ex in self.records))
+        self.muscle_bits = self._encode(self.muscles, (ex.get('target_muscles', []) for ex in self.records))
+
+    @classmethod
+    def from_library(cls, library: Dict[str, List[Dict[str, Any]]],
+                     columns: Optional[Dict[str, np.ndarray]] = None) -> 'ExerciseCatalog':
+        """Build a catalog of frozen records from the categorised dict-of-lists exercise library."""
+        return cls([ExerciseRecord.from_dict(ex) for category in library.values() for ex in category], columns)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def _build_vocabulary(initial: Iterable[str], values: Iterable[Iterable[str]]) -> Dict[str, int]:
+        vocabulary: Dict[str, int] = {}
+        for value in initial:
+            vocabulary.setdefault(value, len(vocabulary))
+        for row in values:
+            for value in row:
+                vocabulary.setdefault(value, len(vocabulary))
+        return vocabulary
+
+    @staticmethod
+    def _words(vocabulary: Dict[str, int]) -> int:
+        return max(1, -(-len(vocabulary) // WORD_BITS))
+
+    @classmethod
+    def _split_words(cls, bits: int, words: int) -> List[int]:
+        word_mask = (1 << WORD_BITS) - 1
+        return [(bits >> (WORD_BITS * word)) & word_mask for word in range(words)]
+
+    @classmethod
+    def _encode(cls, vocabulary: Dict[str, int], values: Iterable[Iterable[str]]) -> np.ndarray:
+        words = cls._words(vocabulary)
+        rows = [cls._split_words(sum(1 << vocabulary[value] for value in set(row)), words) for row in values]
+        return np.array(rows, dtype=np.uint64).reshape(len(rows), words)
+
+    @classmethod
+    def bits_for(cls, vocabulary: Dict[str, int], values: Iterable[str]) -> np.ndarray:
+        """(words,) bitmask for a set of values; values missing from the vocabulary are ignored."""
+        bits = 0
+        for value in values:
+            if value in vocabulary:
+                bits |= 1 << vocabulary[value]
+        return np.array(cls._split_words(bits, cls._words(vocabulary)), dtype=np.uint64)
+
+    def mask(
+        self,
+        types: Optional[Iterable[str]] = None,
+        phase: Optional[str] = None,
+        available_equipment: Optional[Iterable[str]] = None,
+        muscles: Optional[Iterable[str]] = None,
+        include_unphased: bool = False
+    ) -> np.ndarray:
+        """
+        Boolean row mask for the combined filter.
+
+        Args:
+            types: Keep exercises of any of these types
+            phase: Keep exercises suitable for this cycle phase
+            available_equipment: Keep exercises whose required equipment is a subset of this
+            muscles: Keep exercises targeting any of these muscles
+            include_unphased: With a phase filter, also keep exercises that list no phases
+        """
+        result = np.ones(len(self.records), dtype=bool)
+
+        if types is not None:
+            result &= self._any(self.type_bits, self.bits_for(self.types, types))
+
+        if phase:
+            phase_match = self._any(self.phase_bits, self.bits_for(self.phases, [phase]))
+            if include_unphased:
+                phase_match |= ~self.phase_bits.any(axis=1)
+            result &= phase_match
+
+        if available_equipment is not None:
+            missing = ~self.bits_for(self.equipment, available_equipment)
+            result &= ~self._any(self.equipment_bits, missing)
+
+        if muscles is not None:
+            result &= self._any(self.muscle_bits, self.bits_for(self.muscles, muscles))
+
+        return result
+
+    @staticmethod
+    def _any(bits: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Rows sharing at least one bit with the query."""
+        if bits.shape[1] == 1:
+            # The common single-word case avoids the reduction over words
+            return (bits[:, 0] & query[0]) != 0
+        return (bits & query).any(axis=1)
+
+    def rows(self, mask: np.ndarray) -> np.ndarray:
+        """Row indices selected by a mask."""
+        return np.flatnonzero(mask)
+
+    def select(self, rows: Iterable[int]) -> List[ExerciseRecord]:
+        """Exercise records for the given row indices."""
+        return [self.records[row] for row in rows]
@@ -1,16 +1,85 @@
+import copy
+import threading
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from typing import Dict, List, Any, Union
-from ..schemas import WorkoutRequestFromFrontend
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple, Union
+from .. import metrics
+from .catalog import ExerciseCatalog
+from .lookup import DifficultyTable, compile_difficulty_table
+from .records import ExerciseRecord, PlannedExercise
+from .model_store import (
+    artifact_digest,
+    load_model_artifact,
+    read_model_artifact,
+    train_difficulty_model,
+)
+from .preload import get_preload_dir, load_bundle
+from .rules import CARDIO_DURATION_MODIFIER, REPS_MODIFIER, SETS_MODIFIER, RuleTable, default_rules
+
+if TYPE_CHECKING:
+    # sklearn is only imported when a model is actually trained or unpickled
+    from sklearn.ensemble import RandomForestClassifier
 
 class WorkoutRecommender:
-    def __init__(self):
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        rules: Optional[RuleTable] = None,
+        preload_dir: Union[str, Path, bool, None] = None
+    ):
+        """
+        Args:
+            model_path: Difficulty model artifact (defaults to DIFFICULTY_MODEL_PATH)
+            rules: Compiled goal/phase rules (defaults to the bundled rules.json)
+            preload_dir: Preload bundle to memory-map (defaults to PRELOAD_DIR; False disables)
+        """
+        # Goal/phase rules are compiled once per process and shared between recommenders
+        self.rules = rules if rules is not None else default_rules()
+        self.model_path = model_path
+        self._model_lock = threading.Lock()
+        bundle = load_bundle(get_preload_dir() if preload_dir is None else preload_dir or None)
+        if bundle is not None and artifact_digest(read_model_artifact(model_path)) != bundle['artifact_sha256']:
+            # The bundle is only used with the artifact it was compiled from
+            bundle = None
         # Load the exercise library and initialize the difficulty model
-        self.exercise_library = self._load_exercise_library()
-        self.difficulty_model = self._initialize_difficulty_model()
+        # The catalog holds frozen records; plans only ever overlay sets/reps/duration
+        self.catalog = ExerciseCatalog.from_library(
+            self._load_exercise_library(), bundle['columns'] if bundle else None
+        )
+        self.exercise_library = self._categorize_records()
+        self._difficulty_model = None
+        if self.catalog.preloaded:
+            # Table and predictions come from the bundle; the forest is loaded on demand
+            self.model_version = bundle['model_version']
+            self.difficulty_table = DifficultyTable(bundle['difficulty_table'])
+            self.predicted_difficulty = dict(zip(self.catalog.ids.tolist(), self.catalog.predicted_difficulty.tolist()))
+        else:
+            self._difficulty_model, self.model_version = self._initialize_difficulty_model(model_path)
+            self.difficulty_table = compile_difficulty_table(self._difficulty_model)
+            self.predicted_difficulty = self._score_exercise_library()
+
+    @property
+    def difficulty_model(self) -> 'RandomForestClassifier':
+        """The difficulty classifier; a preloaded recommender only loads it on first use."""
+        if self._difficulty_model is None:
+            with self._model_lock:
+                if self._difficulty_model is None:
+                    # Memory-mapped from the artifact, like a recommender built without a bundle
+                    model, version = self._initialize_difficulty_model(self.model_path)
+                    if version != self.model_version:
+                        # The artifact was replaced (a promoted model) after the bundle was checked
+                        raise RuntimeError(
+                            f"Difficulty model {version} does not match the preloaded table ({self.model_version})"
+                        )
+                    self._difficulty_model = model
+        return self._difficulty_model
+
+    @difficulty_model.setter
+    def difficulty_model(self, model: 'RandomForestClassifier') -> None:
+        self._difficulty_model = model
 
     def _load_exercise_library(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load the exercise library with categorized exercises"""
+        """Load the raw exercise library with categorized exercises"""
         return {
             'strength': [
                 {
@@ -198,185 +267,112 @@ class WorkoutRecommender:
             ]
         }
 
-    def _initialize_difficulty_model(self) -> RandomForestClassifier:
+    def _categorize_records(self) -> Dict[str, List[ExerciseRecord]]:
+        """Read-only view of the catalog records grouped by exercise type"""
+        library: Dict[str, List[ExerciseRecord]] = {}
+        for record in self.catalog.records:
+            library.setdefault(record.type, []).append(record)
+        return library
+
+    def _initialize_difficulty_model(self, model_path: Optional[str] = None) -> Tuple['RandomForestClassifier', str]:
         """
-        Initialize and train a RandomForestClassifier to predict exercise difficulty.
-        Returns a trained model that can predict difficulty levels (1-5) based on exercise features.
+        Load the difficulty classifier from its versioned artifact.
+        Falls back to training from the built-in samples if no artifact exists.
+        Returns a trained model that can predict difficulty levels (1-5) based on
+        exercise features, and its version.
         """
-        # In production, this training data would come from a database
-        # Here we create sample training data
-        sample_exercises = [
-            # Format: [muscle_groups_count, equipment_count, compound_movement(0/1), cardio_intensity, strength_intensity]
-            # Easy exercises (difficulty 1)
-            [1, 0, 0, 1, 1],  # Walking
-            [2, 0, 0, 1, 2],  # Body weight squats
-            [1, 0, 0, 2, 1],  # Arm circles
-            
-            # Moderate exercises (difficulty 2)
-            [2, 1, 0, 2, 2],  # Dumbbell curls
-            [3, 0, 1, 2, 2],  # Push-ups
-            [2, 1, 0, 3, 2],  # Resistance band rows
-            
-            # Intermediate exercises (difficulty 3)
-            [3, 1, 1, 3, 3],  # Kettlebell swings
-            [4, 2, 1, 2, 3],  # Barbell bench press
-            [3, 1, 1, 3, 3],  # Dumbbell lunges
-            
-            # Advanced exercises (difficulty 4)
-            [4, 2, 1, 4, 4],  # Clean and press
-            [5, 2, 1, 3, 4],  # Barbell deadlifts
-            [4, 1, 1, 4, 4],  # Plyometric push-ups
-            
-            # Expert exercises (difficulty 5)
-            [5, 2, 1, 5, 5],  # Olympic snatch
-            [5, 2, 1, 4, 5],  # Heavy compound supersets
-            [4, 1, 1, 5, 5],  # Muscle-ups
-        ]
-        
-        # Create corresponding difficulty labels (1-5)
-        difficulty_labels = [
-            1, 1, 1,  # Easy
-            2, 2, 2,  # Moderate
-            3, 3, 3,  # Intermediate
-            4, 4, 4,  # Advanced
-            5, 5, 5   # Expert
-        ]
-        
-        # Convert to numpy arrays
-        X = np.array(sample_exercises)
-        y = np.array(difficulty_labels)
-        
-        # Initialize and train the model
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=5,
-            min_samples_split=4,
-            min_samples_leaf=2,
-            random_state=42
-        )
+        artifact = load_model_artifact(model_path)
+        if artifact is not None:
+            return artifact['model'], artifact['version']
+
+        model, fingerprint = train_difficulty_model()
+        return model, f"untracked-{fingerprint}"
+
+    def with_model(self, model: 'RandomForestClassifier', version: str) -> 'WorkoutRecommender':
+        """
+        Return a new recommender that uses the given difficulty model.
+
+        The exercise records, bitmasks and vocabularies are shared with this
+        instance (they are never written after construction); only the compiled
+        table and the predicted difficulty column are rebuilt. This instance is
+        left untouched, so it can keep serving requests until the new one is
+        published.
+        """
+        recommender = copy.copy(self)
+        recommender.catalog = copy.copy(self.catalog)
+        recommender.catalog.predicted_difficulty = np.zeros(len(self.catalog), dtype=self.catalog.predicted_difficulty.dtype)
+        recommender.model_version = version
+        recommender.difficulty_model = model
+        recommender.difficulty_table = compile_difficulty_table(model)
+        recommender.predicted_difficulty = recommender._score_exercise_library()
+        return recommender
+
+    def _get_workout_split(self, user_data: Dict) -> Dict[str, float]:
+        """Workout type proportions for the user's goal, adjusted for cycle phase."""
+        # Every goal/phase split is precomputed in the rule table; the dict is shared, do not modify it
+        return self.rules.workout_split(user_data['fitness_goal'], user_data.get('cycle_phase'))
+    
+    def _get_candidate_rows(self, workout_type: str, proportion: float, user_data: Dict):
+        """
+        Catalog rows eligible for one workout type and how many to pick from them.
         
-        model.fit(X, y)
-        return model
+        Returns:
+            Tuple of (rows, count); count is 0 when the type contributes no exercises.
+        """
+        catalog = self.catalog
+        if workout_type not in catalog.types or proportion <= 0:
+            return None, 0
+        
+        count = int(5 * proportion)  # Base count of 5 exercises distributed by proportion
+        if count <= 0:
+            return None, 0
+        
+        # Filter exercises by phase and equipment if available
+        rows = catalog.rows(catalog.mask(
+            types=[workout_type],
+            phase=user_data.get('cycle_phase'),
+            available_equipment=user_data.get('available_equipment') or None
+        ))
+        
+        # If no exercises are suitable, use unfiltered exercises of this type
+        if not len(rows):
+            rows = catalog.rows(catalog.mask(types=[workout_type]))
+        
+        return rows, min(count, len(rows))
+    
+    def _apply_default_prescription(self, exercise: PlannedExercise) -> PlannedExercise:
+        """Set the base sets/reps/duration on a plan overlay; the record stays untouched."""
+        sets, reps, duration = self.rules.prescription(exercise.record.type)
+        exercise.sets = sets
+        if reps is not None:
+            exercise.reps = reps
+        if duration is not None:
+            exercise.duration = duration  # seconds
+        return exercise
     
     def _create_base_plan(self, user_data: Dict) -> Dict:
         """Create a base workout plan based on user data."""
-        # Map fitness goals to workout types
-        goal_to_workout = {
-            'Weight Loss': {'cardio': 0.6, 'strength': 0.3, 'flexibility': 0.1},
-            'Muscle Gain': {'strength': 0.7, 'cardio': 0.2, 'flexibility': 0.1},
-            'General Fitness': {'strength': 0.4, 'cardio': 0.4, 'flexibility': 0.2},
-            'Toning': {'strength': 0.5, 'cardio': 0.3, 'flexibility': 0.2},
-            'Endurance': {'cardio': 0.7, 'strength': 0.2, 'flexibility': 0.1}
-        }
-        
-        # Get workout type distribution based on goal
-        workout_split = goal_to_workout.get(
-            user_data['fitness_goal'],
-            {'strength': 0.4, 'cardio': 0.4, 'flexibility': 0.2}  # Default split
-        )
-        
-        # Check if menstrual cycle tracking is enabled and adjust workout composition
-        if user_data.get('cycle_phase'):
-            workout_split = self._adjust_workout_split_for_phase(workout_split, user_data['cycle_phase'])
-        
         exercises = []
         
         # Add exercises for each workout type
-        for workout_type, proportion in workout_split.items():
-            if workout_type in self.exercise_library and proportion > 0:
-                count = int(5 * proportion)  # Base count of 5 exercises distributed by proportion
-                if count > 0:
-                    # Filter exercises by phase if available
-                    available_exercises = self.exercise_library[workout_type]
-                    if user_data.get('cycle_phase'):
-                        available_exercises = [
-                            ex for ex in available_exercises 
-                            if user_data['cycle_phase'] in ex.get('suitable_for_phases', [])
-                        ]
-                    
-                    # If no exercises are suitable for this phase, use unfiltered exercises
-                    if not available_exercises and workout_type in self.exercise_library:
-                        available_exercises = self.exercise_library[workout_type]
-                    
-                    if available_exercises:
-                        selected = list(np.random.choice(
-                            available_exercises,
-                            size=min(count, len(available_exercises)),
-                            replace=False
-                        ))
-                        exercises.extend(selected)
-        
-        # Add exercise parameters
-        for exercise in exercises:
-            if 'sets' not in exercise:
-                exercise['sets'] = 3 if exercise.get('type') == 'strength' else 1
-            if 'reps' not in exercise:
-                if exercise.get('type') == 'strength':
-                    exercise['reps'] = 12
-                elif exercise.get('type') == 'cardio':
-                    exercise['reps'] = '30 seconds'
-                elif exercise.get('type') in ['flexibility', 'recovery']:
-                    exercise['reps'] = '45 seconds'
+        for workout_type, proportion in self._get_workout_split(user_data).items():
+            rows, count = self._get_candidate_rows(workout_type, proportion, user_data)
+            if count > 0:
+                selected = np.random.choice(rows, size=count, replace=False)
+                exercises.extend(
+                    self._apply_default_prescription(PlannedExercise(record))
+                    for record in self.catalog.select(selected)
+                )
         
         return {
             'exercises': exercises,
             'total_duration': 45,  # minutes
-            'difficulty': np.mean([ex.get('difficulty', 3) for ex in exercises]) if exercises else 3
+            'difficulty': np.mean([ex.record.difficulty for ex in exercises]) if exercises else 3
         }
     
     def _adjust_workout_split_for_phase(self, workout_split: Dict[str, float], phase: str) -> Dict[str, float]:
         """Adjust workout type proportions based on menstrual cycle phase"""
-        phase_adjustments = {
-            'menstrual': {
-                'strength': 0.6,  # Reduce strength
-                'cardio': 0.5,    # Reduce cardio
-                'flexibility': 1.5,  # Increase flexibility
-                'recovery': 2.0   # Add recovery
-            },
-            'follicular': {
-                'strength': 1.2,  # Increase strength
-                'cardio': 1.1,    # Slightly increase cardio
-                'flexibility': 0.8,  # Slightly reduce flexibility
-                'recovery': 0.7   # Reduce recovery
-            },
-            'ovulation': {
-                'strength': 1.3,  # Maximize strength
-                'cardio': 1.2,    # Increase cardio
-                'flexibility': 0.8,  # Reduce flexibility
-                'recovery': 0.6   # Minimize recovery
-            },
-            'luteal': {
-                'strength': 0.8,  # Reduce strength
-                'cardio': 0.7,    # Reduce cardio
-                'flexibility': 1.3,  # Increase flexibility
-                'recovery': 1.5   # Increase recovery
-            }
-        }
-        
-        # Get adjustment factors for the current phase
-        adj = phase_adjustments.get(phase, {
-            'strength': 1.0,
-            'cardio': 1.0,
-            'flexibility': 1.0,
-            'recovery': 1.0
-        })
-        
-        # Apply adjustments
-        adjusted_split = {}
-        for workout_type, proportion in workout_split.items():
-            adjusted_split[workout_type] = proportion * adj.get(workout_type, 1.0)
-        
-        # Add recovery if not present for menstrual and luteal phases
-        if phase in ['menstrual', 'luteal'] and 'recovery' not in adjusted_split:
-            adjusted_split['recovery'] = 0.2
-        
-        # Normalize to ensure total equals 1
-        total = sum(adjusted_split.values())
-        if total > 0:
-            for workout_type in adjusted_split:
-                adjusted_split[workout_type] /= total
-        
-        return adjusted_split
+        return self.rules.adjust_split(workout_split, phase)
     
     def _finalize_plan(self, plan: Dict, user_data: Dict) -> Dict:
         """Finalize the workout plan with user-specific adjustments."""
@@ -387,11 +383,11 @@ class WorkoutRecommender:
         
         for exercise in plan['exercises']:
             # Adjust sets and reps based on fitness level
-            if exercise.get('type') == 'strength':
-                exercise['sets'] = max(2, round(exercise.get('sets', 3) * difficulty_modifier))
-                exercise['reps'] = max(5, round(exercise.get('reps', 12) * difficulty_modifier))
-            elif exercise.get('type') == 'cardio' and isinstance(exercise.get('reps'), int):
-                exercise['reps'] = max(15, round(exercise.get('reps', 30) * difficulty_modifier))
+            if exercise.record.type == 'strength':
+                exercise.sets = max(2, round((exercise.sets or 3) * difficulty_modifier))
+                exercise.reps = max(5, round((exercise.reps or 12) * difficulty_modifier))
+            elif exercise.record.type == 'cardio' and exercise.reps is not None:
+                exercise.reps = max(15, round(exercise.reps * difficulty_modifier))
         
         # Apply cycle-specific intensity adjustments if applicable
         if user_data.get('cycle_phase'):
@@ -405,115 +401,159 @@ class WorkoutRecommender:
     
     def _adjust_intensity_for_cycle(self, plan: Dict, phase: str) -> Dict:
         """Apply intensity adjustments based on menstrual cycle phase"""
-        phase_intensity_adjustments = {
-            'menstrual': {
-                'sets_modifier': 0.8,
-                'reps_modifier': 0.9,
-                'cardio_duration_modifier': 0.8,
-                'intensity_advice': 'Keep intensity lower to accommodate possible discomfort. Focus on movement rather than intensity.'
-            },
-            'follicular': {
-                'sets_modifier': 1.0,
-                'reps_modifier': 1.0,
-                'cardio_duration_modifier': 1.0,
-                'intensity_advice': 'You can gradually increase intensity throughout this phase as energy levels rise.'
-            },
-            'ovulation': {
-                'sets_modifier': 1.2,
-                'reps_modifier': 1.1,
-                'cardio_duration_modifier': 1.2,
-                'intensity_advice': 'Energy levels are likely at their peak. Take advantage with higher intensity workouts if feeling good.'
-            },
-            'luteal': {
-                'sets_modifier': 0.9,
-                'reps_modifier': 0.9,
-                'cardio_duration_modifier': 0.9,
-                'intensity_advice': 'As this phase progresses, you may want to gradually reduce intensity. Listen to your body.'
-            }
-        }
-        
-        # Get adjustment factors
-        adj = phase_intensity_adjustments.get(phase, {
-            'sets_modifier': 1.0,
-            'reps_modifier': 1.0,
-            'cardio_duration_modifier': 1.0,
-            'intensity_advice': 'Maintain your normal intensity level.'
-        })
+        modifiers, advice = self.rules.intensity_row(phase)
+        sets_modifier, reps_modifier, cardio_duration_modifier = (
+            float(modifiers[SETS_MODIFIER]), float(modifiers[REPS_MODIFIER]), float(modifiers[CARDIO_DURATION_MODIFIER])
+        )
         
         # Apply adjustments to each exercise
         for exercise in plan['exercises']:
-            if exercise.get('type') == 'strength':
-                exercise['sets'] = max(1, round(exercise.get('sets', 3) * adj['sets_modifier']))
-                if isinstance(exercise.get('reps'), int):
-                    exercise['reps'] = max(5, round(exercise.get('reps', 12) * adj['reps_modifier']))
-            elif exercise.get('type') == 'cardio' and isinstance(exercise.get('reps'), str) and 'seconds' in exercise.get('reps', ''):
-                # Extract seconds, adjust, and reconstruct string
-                try:
-                    seconds = int(exercise['reps'].split()[0])
-                    adjusted_seconds = max(15, round(seconds * adj['cardio_duration_modifier']))
-                    exercise['reps'] = f"{adjusted_seconds} seconds"
-                except (ValueError, IndexError):
-                    pass  # Keep original if parsing fails
+            if exercise.record.type == 'strength':
+                exercise.sets = max(1, round((exercise.sets or 3) * sets_modifier))
+                if exercise.reps is not None:
+                    exercise.reps = max(5, round(exercise.reps * reps_modifier))
+            elif exercise.record.type == 'cardio' and exercise.duration is not None:
+                exercise.duration = max(15, round(exercise.duration * cardio_duration_modifier))
         
         # Add intensity advice to the plan
-        plan['intensity_advice'] = adj['intensity_advice']
+        plan['intensity_advice'] = advice
         
         return plan
     
     def _get_phase_recommendations(self, phase: str) -> Dict[str, str]:
-        """Get phase-specific workout and nutrition recommendations"""
-        recommendations = {
-            'menstrual': {
-                'workout': 'Focus on gentle movement like walking, swimming, light yoga, and mobility work. Consider reducing workout duration and avoid high-intensity training.',
-                'nutrition': 'Consider increasing iron-rich foods like leafy greens and lean meats. Stay well-hydrated and include anti-inflammatory foods like berries, fatty fish, and turmeric.',
-                'recovery': 'Prioritize sleep and rest. Heat packs can help manage cramps. Gentle stretching may alleviate discomfort.'
-            },
-            'follicular': {
-                'workout': 'Your energy is building, making this a good time to start adding intensity. Focus on progressive strength training and moderate cardio.',
-                'nutrition': 'Support muscle building with adequate protein. Include complex carbs for sustained energy during longer workouts.',
-                'recovery': 'Standard recovery protocols work well here. Focus on good sleep habits and adequate hydration.'
-            },
-            'ovulation': {
-                'workout': 'Energy levels are typically highest now. Take advantage with more challenging workouts, HIIT, and heavier weights if you are feeling good.',
-                'nutrition': 'Support higher intensity workouts with adequate carbohydrates. Stay well-hydrated, especially during intense sessions.',
-                'recovery': 'With increased workout intensity, pay attention to recovery. Consider adding foam rolling and targeted stretching.'
-            },
-            'luteal': {
-                'workout': 'As progesterone rises, you may notice decreased energy. Consider reducing intensity, especially in the later part of this phase. Focus on steady-state cardio and lighter weights with higher reps.',
-                'nutrition': 'You may experience increased appetite. Focus on fiber-rich foods and complex carbs to help manage cravings. Magnesium-rich foods like nuts and dark chocolate may help with symptoms.',
-                'recovery': 'You might need extra recovery time. Listen to your body and do not push through fatigue. Restorative yoga and extra sleep can be beneficial.'
-            }
-        }
-        
-        return recommendations.get(phase, {
-            'workout': 'Follow your regular workout routine, adjusting based on how you feel each day.',
-            'nutrition': 'Focus on balanced nutrition with adequate protein, complex carbohydrates, and healthy fats.',
-            'recovery': 'Prioritize consistent sleep and recovery practices.'
-        })
+        """Get phase-specific workout and nutrition recommendations (shared, do not modify)"""
+        return self.rules.phase_recommendations(phase)
 
     def generate_workout(self, user_data: Dict) -> Dict:
         """Generate a personalized workout plan based on user data and menstrual cycle if tracked"""
-        base_plan = self._create_base_plan(user_data)
-        finalized_plan = self._finalize_plan(base_plan, user_data)
+        with metrics.stage('base_plan'):
+            base_plan = self._create_base_plan(user_data)
+        with metrics.stage('finalize_plan'):
+            finalized_plan = self._finalize_plan(base_plan, user_data)
         
         # Add workout summary
         if finalized_plan['exercises']:
-            workout_types = {}
-            for ex in finalized_plan['exercises']:
-                ex_type = ex.get('type', 'other')
-                if ex_type not in workout_types:
-                    workout_types[ex_type] = 0
-                workout_types[ex_type] += 1
-            
-            finalized_plan['summary'] = {
-                'exercise_count': len(finalized_plan['exercises']),
-                'average_difficulty': np.mean([ex.get('difficulty', 3) for ex in finalized_plan['exercises']]),
-                'workout_composition': workout_types,
-                'menstrual_phase': user_data.get('cycle_phase', 'not_tracked')
-            }
+            finalized_plan['summary'] = self._summarize_plan(
+                finalized_plan['exercises'],
+                np.mean([ex.get('difficulty', 3) for ex in finalized_plan['exercises']]),
+                user_data
+            )
         
         return finalized_plan
 
+    def _summarize_plan(self, exercises: List[PlannedExercise], average_difficulty: float, user_data: Dict) -> Dict:
+        """Workout summary block attached to a generated plan"""
+        workout_types = {}
+        for ex in exercises:
+            ex_type = ex.get('type', 'other')
+            if ex_type not in workout_types:
+                workout_types[ex_type] = 0
+            workout_types[ex_type] += 1
+        
+        return {
+            'exercise_count': len(exercises),
+            'average_difficulty': average_difficulty,
+            'workout_composition': workout_types,
+            'menstrual_phase': user_data.get('cycle_phase', 'not_tracked')
+        }
+
+    def generate_workouts(self, users: List[Dict], rng: Optional[np.random.Generator] = None) -> List[Dict]:
+        """
+        Generate workout plans for many users at once.
+        
+        Users are grouped by goal, cycle phase, fitness level and equipment. Everything
+        that depends only on those inputs (split, candidate rows, sets/reps adjustments,
+        phase advice) is computed once per group; exercise selection for the whole group
+        is a single vectorised RNG draw, and difficulties come from the catalog's
+        precomputed predictions.
+        
+        Args:
+            users (List[Dict]): User data dictionaries, as accepted by generate_workout
+            rng (np.random.Generator, optional): Random generator, for reproducible batches
+        
+        Returns:
+            List[Dict]: One plan per user, in input order. Each plan has the same keys as
+            generate_workout plus 'exercise_difficulties', the predicted difficulty of
+            each exercise.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        
+        groups: Dict[tuple, List[int]] = {}
+        for index, user_data in enumerate(users):
+            groups.setdefault(self._group_key(user_data), []).append(index)
+        
+        plans: List[Dict] = [None] * len(users)
+        for indices in groups.values():
+            group_plans = self._generate_group([users[i] for i in indices], rng)
+            for index, plan in zip(indices, group_plans):
+                plans[index] = plan
+        
+        return plans
+
+    def _group_key(self, user_data: Dict) -> tuple:
+        """Inputs that fully determine a plan apart from exercise selection."""
+        return (
+            user_data.get('fitness_goal'),
+            user_data.get('cycle_phase') or None,
+            user_data.get('fitness_level', 3),
+            tuple(sorted(user_data.get('available_equipment') or ())),
+        )
+
+    def _generate_group(self, group_users: List[Dict], rng: np.random.Generator) -> List[Dict]:
+        """Generate plans for users sharing the same group key."""
+        user_data = group_users[0]
+        size = len(group_users)
+        catalog = self.catalog
+        
+        # Pick exercises for every user of the group, one type at a time
+        blocks = []
+        prototypes = []
+        for workout_type, proportion in self._get_workout_split(user_data).items():
+            rows, count = self._get_candidate_rows(workout_type, proportion, user_data)
+            if count <= 0:
+                continue
+            
+            # A random subset per user: the `count` smallest of uniform random keys
+            keys = rng.random((size, len(rows)))
+            if count < len(rows):
+                picks = np.argpartition(keys, count - 1, axis=1)[:, :count]
+            else:
+                picks = np.argsort(keys, axis=1)
+            blocks.append(rows[picks])
+            
+            # Sets/reps only depend on type and group inputs, so finalize them once
+            prototypes.extend(
+                self._apply_default_prescription(PlannedExercise(catalog.records[rows[0]]))
+                for _ in range(count)
+            )
+        
+        prototype_plan = self._finalize_plan({'exercises': prototypes}, user_data)
+        selected = np.hstack(blocks) if blocks else np.empty((size, 0), dtype=np.intp)
+        
+        difficulty = catalog.difficulty[selected].mean(axis=1) if selected.shape[1] else np.full(size, 3.0)
+        predicted = catalog.predicted_difficulty[selected]
+        
+        plans = []
+        for user_index in range(size):
+            exercises = [
+                PlannedExercise(catalog.records[row], proto.sets, proto.reps, proto.duration)
+                for row, proto in zip(selected[user_index], prototypes)
+            ]
+            plan = {
+                'exercises': exercises,
+                'total_duration': 45,  # minutes
+                'difficulty': difficulty[user_index],
+                'exercise_difficulties': predicted[user_index].tolist()
+            }
+            for key in ('intensity_advice', 'phase_recommendations'):
+                if key in prototype_plan:
+                    plan[key] = prototype_plan[key]
+            if exercises:
+                plan['summary'] = self._summarize_plan(exercises, difficulty[user_index], group_users[user_index])
+            plans.append(plan)
+        
+        return plans
+
     def predict_exercise_difficulty(self, exercise: Dict) -> int:
         """
         Predict the difficulty level of a given exercise based on its features.
@@ -527,6 +567,11 @@ class WorkoutRecommender:
         # Extract features from exercise dictionary
         features = self.get_exercise_features(exercise)
         
+        # Features inside the bounded domain are answered from the compiled table
+        predicted_difficulty = self.difficulty_table.lookup(features)
+        if predicted_difficulty is not None:
+            return predicted_difficulty
+        
         # Reshape features for prediction
         X = np.array(features).reshape(1, -1)
         
@@ -535,6 +580,36 @@ class WorkoutRecommender:
         
         return int(predicted_difficulty)
 
+    def predict_exercise_difficulty_batch(self, exercises: List[Dict]) -> List[int]:
+        """
+        Predict the difficulty level of many exercises at once.
+        
+        Builds one feature matrix, answers in-range rows from the compiled table and
+        sends the remaining rows to the model in a single predict call.
+        
+        Args:
+            exercises (List[Dict]): Exercise dictionaries containing exercise details
+        
+        Returns:
+            List[int]: Predicted difficulty level (1-5) for each exercise, in order
+        """
+        if not exercises:
+            return []
+        
+        X = np.array([self.get_exercise_features(exercise) for exercise in exercises])
+        predictions, in_range = self.difficulty_table.lookup_batch(X)
+        
+        if not in_range.all():
+            predictions[~in_range] = self.difficulty_model.predict(X[~in_range])
+        
+        return [int(difficulty) for difficulty in predictions]
+
+    def _score_exercise_library(self) -> Dict[int, int]:
+        """Precompute the predicted difficulty of every library exercise, keyed by id."""
+        difficulties = self.predict_exercise_difficulty_batch(self.catalog.records)
+        self.catalog.predicted_difficulty[:] = difficulties
+        return dict(zip(self.catalog.ids.tolist(), difficulties))
+
     def get_exercise_features(self, exercise: Dict) -> List[int]:
         """
         Extract numerical features from exercise dictionary for difficulty prediction.
@@ -566,14 +641,14 @@ class WorkoutRecommender:
         if not phase:
             return self.exercise_library
         
+        catalog = self.catalog
+        phase_mask = catalog.mask(phase=phase, include_unphased=True)
+        
         filtered_library = {}
-        for category, exercises in self.exercise_library.items():
-            filtered_exercises = [
-                ex for ex in exercises 
-                if phase in ex.get('suitable_for_phases', []) or not ex.get('suitable_for_phases')
-            ]
-            if filtered_exercises:
-                filtered_library[category] = filtered_exercises
+        for category in catalog.types:
+            rows = catalog.rows(phase_mask & catalog.mask(types=[category]))
+            if len(rows):
+                filtered_library[category] = catalog.select(rows)
         
         return filtered_library
 
@@ -588,39 +663,4 @@ class WorkoutRecommender:
         Returns:
             str: Advice specific to the phase and exercise type
         """
-        general_advice = {
-            'menstrual': "During your period, focus on gentle movement. Listen to your body and reduce intensity if experiencing cramps or discomfort. This is a good time for walking, light yoga, and mobility work.",
-            'follicular': "As estrogen rises after your period, energy levels typically increase. This is a good time to gradually increase workout intensity and try new challenging exercises.",
-            'ovulation': "Around ovulation, estrogen peaks and many women experience peak strength and energy. Take advantage by scheduling more intense workouts if you feel good.",
-            'luteal': "As progesterone rises, you may notice decreased energy and increased body temperature. Consider more moderate workouts and extra recovery time, especially in the later part of this phase."
-        }
-        
-        exercise_specific_advice = {
-            'strength': {
-                'menstrual': "Reduce weight and increase reps. Focus on form rather than pushing for personal records.",
-                'follicular': "Progressive overload works well in this phase. Track your lifts and aim for steady improvement.",
-                'ovulation': "You may feel stronger now. This can be a good time to test your strength levels or try heavier weights if you feel good.",
-                'luteal': "Maintain rather than push limits. Consider using lighter weights with higher reps."
-            },
-            'cardio': {
-                'menstrual': "Lower intensity, steady-state cardio is often better tolerated. Consider reducing duration by 20-30%.",
-                'follicular': "You can gradually increase intensity. This is a good time to introduce interval training.",
-                'ovulation': "Your body may handle high-intensity work better now. HIIT and sprint work can be effective if you're feeling energetic.",
-                'luteal': "Your body temperature is elevated, making intense cardio feel harder. Reduce intensity and stay extra hydrated."
-            },
-            'flexibility': {
-                'menstrual': "Gentle stretching can help alleviate cramps. Avoid deep stretching if you feel additional discomfort.",
-                'follicular': "Regular stretching routines work well here. Your body may feel more responsive to flexibility training.",
-                'ovulation': "Your joints may be slightly more flexible due to hormonal changes. Be careful not to overstretch.",
-                'luteal': "Focus on restorative yoga and gentle stretching, especially if experiencing PMS symptoms."
-            }
-        }
-        
-        advice = general_advice.get(phase, "Listen to your body and adjust your workout based on how you feel.")
-        
-        if exercise_type and exercise_type in exercise_specific_advice:
-            specific_advice = exercise_specific_advice[exercise_type].get(phase, "")
-            if specific_advice:
-                advice += f" {specific_advice}"
-        
-        return advice
\ No newline at end of file
+        return self.rules.phase_advice(phase, exercise_type)
@@ -0,0 +1,61 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Inclusive upper bound of each difficulty feature, in get_exercise_features order:
+# [muscle_groups_count, equipment_count, compound_movement(0/1), cardio_intensity, strength_intensity]
+FEATURE_BOUNDS: Tuple[int, ...] = (8, 4, 1, 5, 5)
+
+
+class DifficultyTable:
+    """
+    Dense lookup table holding the classifier's prediction for every point of
+    the bounded feature domain.
+
+    All features are small non-negative integers, so the whole domain is a few
+    thousand points. Evaluating the model over it once turns each prediction into
+    a single array index. Features outside the domain return None and the caller
+    falls back to the model.
+    """
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+        self.shape = table.shape
+
+    def lookup(self, features: Sequence[int]) -> Optional[int]:
+        """Return the tabulated difficulty, or None if the features are out of range."""
+        for value, size in zip(features, self.shape):
+            if not isinstance(value, (int, np.integer)) or not 0 <= value < size:
+                return None
+        return int(self.table[tuple(features)])
+
+    def lookup_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorised lookup for a feature matrix.
+
+        Returns:
+            Tuple of (predictions, in_range). Rows where in_range is False hold 0
+            and must be predicted by the model.
+        """
+        X = np.asarray(X)
+        in_range = np.all((X >= 0) & (X < np.array(self.shape)), axis=1)
+        if not np.issubdtype(X.dtype, np.integer):
+            in_range &= np.all(X == np.floor(X), axis=1)
+
+        predictions = np.zeros(len(X), dtype=np.int64)
+        rows = X[in_range].astype(np.intp)
+        predictions[in_range] = self.table[tuple(rows.T)]
+        return predictions, in_range
+
+
+def feature_domain(bounds: Sequence[int] = FEATURE_BOUNDS) -> np.ndarray:
+    """All feature vectors in the bounded domain, in C order of the table."""
+    grid = np.indices(tuple(bound + 1 for bound in bounds))
+    return grid.reshape(len(bounds), -1).T
+
+
+def compile_difficulty_table(model, bounds: Sequence[int] = FEATURE_BOUNDS) -> DifficultyTable:
+    """Evaluate the model over the whole feature domain in a single predict call."""
+    shape = tuple(bound + 1 for bound in bounds)
+    predictions = model.predict(feature_domain(bounds))
+    return DifficultyTable(predictions.astype(np.int8).reshape(shape))
@@ -0,0 +1,178 @@
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # joblib and sklearn are imported on use to keep `import app.main` cheap
+    from sklearn.ensemble import RandomForestClassifier
+
+ARTIFACT_FORMAT = 1
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[2] / "artifacts" / "difficulty_model.joblib"
+
+MODEL_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 5,
+    'min_samples_split': 4,
+    'min_samples_leaf': 2,
+    'random_state': 42,
+}
+
+# In production, this training data would come from a database
+# Format: [muscle_groups_count, equipment_count, compound_movement(0/1), cardio_intensity, strength_intensity]
+TRAINING_SAMPLES = [
+    # Easy exercises (difficulty 1)
+    [1, 0, 0, 1, 1],  # Walking
+    [2, 0, 0, 1, 2],  # Body weight squats
+    [1, 0, 0, 2, 1],  # Arm circles
+
+    # Moderate exercises (difficulty 2)
+    [2, 1, 0, 2, 2],  # Dumbbell curls
+    [3, 0, 1, 2, 2],  # Push-ups
+    [2, 1, 0, 3, 2],  # Resistance band rows
+
+    # Intermediate exercises (difficulty 3)
+    [3, 1, 1, 3, 3],  # Kettlebell swings
+    [4, 2, 1, 2, 3],  # Barbell bench press
+    [3, 1, 1, 3, 3],  # Dumbbell lunges
+
+    # Advanced exercises (difficulty 4)
+    [4, 2, 1, 4, 4],  # Clean and press
+    [5, 2, 1, 3, 4],  # Barbell deadlifts
+    [4, 1, 1, 4, 4],  # Plyometric push-ups
+
+    # Expert exercises (difficulty 5)
+    [5, 2, 1, 5, 5],  # Olympic snatch
+    [5, 2, 1, 4, 5],  # Heavy compound supersets
+    [4, 1, 1, 5, 5],  # Muscle-ups
+]
+
+# Corresponding difficulty labels (1-5)
+TRAINING_LABELS = [
+    1, 1, 1,  # Easy
+    2, 2, 2,  # Moderate
+    3, 3, 3,  # Intermediate
+    4, 4, 4,  # Advanced
+    5, 5, 5   # Expert
+]
+
+
+def get_model_path() -> Path:
+    """Location of the difficulty model artifact, overridable via DIFFICULTY_MODEL_PATH."""
+    return Path(os.getenv("DIFFICULTY_MODEL_PATH", str(DEFAULT_MODEL_PATH)))
+
+
+def training_fingerprint(samples: List[List[int]], labels: List[int]) -> str:
+    """Short content hash of the training data and hyperparameters."""
+    payload = json.dumps(
+        {'samples': samples, 'labels': labels, 'params': MODEL_PARAMS},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def train_difficulty_model(
+    samples: Optional[List[List[int]]] = None,
+    labels: Optional[List[int]] = None
+) -> Tuple['RandomForestClassifier', str]:
+    """
+    Train the exercise difficulty classifier.
+
+    Returns:
+        Tuple of the fitted model and a content-derived version string.
+    """
+    samples = TRAINING_SAMPLES if samples is None else samples
+    labels = TRAINING_LABELS if labels is None else labels
+
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(**MODEL_PARAMS)
+    model.fit(np.array(samples), np.array(labels))
+    return model, training_fingerprint(samples, labels)
+
+
+def save_model_artifact(
+    model: 'RandomForestClassifier',
+    fingerprint: str,
+    path: Optional[Path] = None,
+    version: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Write a versioned model artifact.
+
+    The artifact is stored uncompressed so the tree arrays can be memory-mapped
+    on load. The write goes to a temporary file first and is then renamed, so a
+    service starting concurrently never sees a half-written artifact.
+
+    The version defaults to the training time plus the fingerprint; pass one to
+    keep the version a model is already published under.
+    """
+    path = Path(path) if path is not None else get_model_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    trained_at = datetime.now(timezone.utc)
+    artifact = {
+        'format': ARTIFACT_FORMAT,
+        'version': version or f"{trained_at:%Y%m%d%H%M%S}-{fingerprint}",
+        'trained_at': trained_at.isoformat(),
+        'params': MODEL_PARAMS,
+        'model': model,
+    }
+
+    import joblib
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+    return artifact
+
+
+def load_model_artifact(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Load a model artifact, memory-mapping its arrays read-only.
+
+    Returns:
+        The artifact dict, or None if no artifact exists at the path.
+    """
+    path = Path(path) if path is not None else get_model_path()
+    if not path.exists():
+        return None
+
+    import joblib
+
+    return _check_format(joblib.load(path, mmap_mode='r'), path)
+
+
+def read_model_artifact(path: Optional[Path] = None) -> Optional[bytes]:
+    """The artifact file's bytes, or None if no artifact exists at the path."""
+    path = Path(path) if path is not None else get_model_path()
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def load_model_artifact_data(data: bytes) -> Dict[str, Any]:
+    """Load an artifact from bytes returned by read_model_artifact()."""
+    import joblib
+
+    return _check_format(joblib.load(io.BytesIO(data)), "artifact data")
+
+
+def artifact_digest(data: Optional[bytes]) -> Optional[str]:
+    """SHA-256 of an artifact's bytes; None when there is no artifact."""
+    return hashlib.sha256(data).hexdigest() if data is not None else None
+
+
+def _check_format(artifact: Dict[str, Any], origin) -> Dict[str, Any]:
+    if artifact.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(
+            f"Unsupported model artifact format {artifact.get('format')!r} in {origin}"
+        )
+    return artifact
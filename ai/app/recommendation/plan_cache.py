@@ -0,0 +1,129 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+def profile_key(user_data: Dict) -> Tuple:
+    """
+    Normalized profile that drives plan generation.
+
+    Only these inputs affect the generated plan, so users sharing them can be
+    served from the same pool of plan variants.
+    """
+    user_metrics = user_data.get('user_metrics') or {}
+    return (
+        user_data.get('fitness_goal'),
+        user_data.get('cycle_phase') or None,
+        user_data.get('fitness_level', 3),
+        user_metrics.get('experience_level'),
+        tuple(sorted(user_data.get('available_equipment') or ())),
+    )
+
+
+class PlanCache:
+    """
+    In-process LRU + TTL cache of generated plans keyed on a normalized profile.
+
+    Each key holds a pool of up to `variants` independently generated plans.
+    While a pool is filling, every lookup builds a new variant; once it is full,
+    lookups return a random variant so users with the same profile still see
+    different exercises. Entries expire `ttl_seconds` after their first variant
+    was built, and the least recently used key is evicted beyond `max_entries`.
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        variants: int = 8,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.variants = max(1, variants)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> 'PlanCache':
+        """Build a cache sized by PLAN_CACHE_SIZE, PLAN_CACHE_TTL and PLAN_CACHE_VARIANTS."""
+        return cls(
+            max_entries=int(os.getenv("PLAN_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.getenv("PLAN_CACHE_TTL", "300")),
+            variants=int(os.getenv("PLAN_CACHE_VARIANTS", "8")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Return a cached variant for key, or build (and cache) a new one."""
+        if not self.enabled:
+            return build()
+
+        now = self._clock()
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is not None and len(entry[1]) >= self.variants:
+                self.hits += 1
+                return random.choice(entry[1])
+            self.misses += 1
+
+        # Build outside the lock so a slow build does not serialize other keys
+        value = build()
+
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is None:
+                self._entries[key] = (now, [value])
+                self._evict_overflow()
+            elif len(entry[1]) < self.variants:
+                entry[1].append(value)
+        return value
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[Tuple[float, List[Any]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] >= self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'variants': self.variants,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,154 @@
+"""
+Recommender state built once and shared by every worker process.
+
+A preload bundle is a directory of .npy files holding the difficulty lookup
+table, the catalog's numeric and bitmask columns (including every exercise's
+predicted difficulty) and a meta.json with the model version. Workers
+memory-map the arrays read-only, so the pages are shared through the page
+cache (use a tmpfs such as /dev/shm to keep them off disk). They also skip
+loading and evaluating the forest: it, and with it scikit-learn, is only
+loaded when a feature vector falls outside the table or a retrain needs it.
+
+    python -m app.recommendation.preload /dev/shm/ai-preload
+    PRELOAD_DIR=/dev/shm/ai-preload uvicorn app.main:app --workers 4
+
+Write the bundle as part of each deploy, after the model artifact. Workers
+ignore a bundle that was compiled from another artifact (its SHA-256 is
+recorded) or whose exercise ids do not match their library, but do not
+otherwise check that it was built from the same code.
+
+For servers that fork workers from a preloaded master (e.g. gunicorn
+--preload), call prepare_for_fork() in the master instead: the recommender
+is built there and the heap is frozen so the garbage collector does not
+un-share its pages in the children.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .model_store import artifact_digest, load_model_artifact_data, read_model_artifact
+
+BUNDLE_FORMAT = 3
+
+# ExerciseCatalog columns stored in a bundle
+CATALOG_COLUMNS = (
+    'ids',
+    'difficulty',
+    'cardio_intensity',
+    'strength_intensity',
+    'muscle_count',
+    'equipment_count',
+    'predicted_difficulty',
+    'phase_bits',
+    'type_bits',
+    'equipment_bits',
+    'muscle_bits',
+)
+
+
+def get_preload_dir() -> Optional[Path]:
+    """Bundle directory from PRELOAD_DIR, or None when preloading is not configured."""
+    value = os.getenv("PRELOAD_DIR")
+    return Path(value) if value else None
+
+
+def write_bundle(recommender, directory: Path) -> Dict[str, Any]:
+    """
+    Write a recommender's table and catalog columns as a bundle.
+
+    Every file is written under a temporary name and renamed; meta.json goes
+    last, so a worker starting concurrently sees either no bundle or a
+    complete one.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    # Workers check the artifact they would load against this digest
+    data = read_model_artifact(recommender.model_path)
+    if data is not None and load_model_artifact_data(data)['version'] != recommender.model_version:
+        raise ValueError(f"Model artifact changed after model {recommender.model_version} was loaded")
+
+    arrays = {name: getattr(recommender.catalog, name) for name in CATALOG_COLUMNS}
+    arrays['difficulty_table'] = recommender.difficulty_table.table
+    for name, array in arrays.items():
+        tmp_path = directory / f"{name}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, directory / f"{name}.npy")
+
+    meta = {
+        'format': BUNDLE_FORMAT,
+        'model_version': recommender.model_version,
+        'artifact_sha256': artifact_digest(data),
+        'exercise_count': len(recommender.catalog),
+    }
+    tmp_path = directory / "meta.json.tmp"
+    tmp_path.write_text(json.dumps(meta))
+    os.replace(tmp_path, directory / "meta.json")
+    return meta
+
+
+def load_bundle(directory: Optional[Path]) -> Optional[Dict[str, Any]]:
+    """
+    Memory-map a bundle read-only.
+
+    Returns:
+        {'model_version', 'artifact_sha256', 'difficulty_table', 'columns'}, or
+        None when there is no complete bundle of this format in the directory.
+    """
+    if directory is None:
+        return None
+    directory = Path(directory)
+    try:
+        meta = json.loads((directory / "meta.json").read_text())
+    except FileNotFoundError:
+        return None
+    if meta.get('format') != BUNDLE_FORMAT:
+        return None
+
+    return {
+        'model_version': meta['model_version'],
+        'artifact_sha256': meta['artifact_sha256'],
+        'difficulty_table': np.load(directory / "difficulty_table.npy", mmap_mode='r'),
+        'columns': {name: np.load(directory / f"{name}.npy", mmap_mode='r') for name in CATALOG_COLUMNS},
+    }
+
+
+def prepare_for_fork(provider) -> None:
+    """
+    Build and warm the shared recommender in a master process that is about to fork workers.
+
+    gc.freeze() moves everything allocated so far out of the collector's
+    generations, so collections in the workers do not write to (and copy)
+    the pages they inherited.
+    """
+    provider.warm()
+    gc.collect()
+    gc.freeze()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write the recommender preload bundle")
+    parser.add_argument('directory', nargs='?', help="bundle directory (defaults to PRELOAD_DIR)")
+    args = parser.parse_args(argv)
+
+    directory = Path(args.directory) if args.directory else get_preload_dir()
+    if directory is None:
+        parser.error("no directory given and PRELOAD_DIR is not set")
+
+    from .engine import WorkoutRecommender
+
+    # Built from the model artifact (or the built-in samples), never from an older bundle
+    meta = write_bundle(WorkoutRecommender(preload_dir=False), directory)
+    print(f"Wrote preload bundle for model {meta['model_version']} "
+          f"({meta['exercise_count']} exercises) to {directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .. import schemas
+from . import utils
+from .catalog import PHASES
+from .engine import WorkoutRecommender
+from .plan_cache import PlanCache, profile_key
+
+MIN_PROGRAM_WEEKS = 4
+MAX_PROGRAM_WEEKS = 8
+
+# Training weekdays (Monday = 0) by fitness level, as produced by
+# schemas.transform_fitness_level (1-3); other days are rest days
+TRAINING_DAYS = {
+    1: (0, 2, 4),
+    2: (0, 1, 3, 5),
+    3: (0, 1, 2, 4, 5),
+}
+
+# Recent average difficulty rating (1-5) above/below which sessions are made easier/harder
+EASIER_ABOVE_RATING = 4.0
+HARDER_BELOW_RATING = 2.0
+FEEDBACK_INTENSITY = {'easier': 0.9, 'neutral': 1.0, 'harder': 1.1}
+
+
+def feedback_bias(recent_rating: Optional[float]) -> str:
+    """Bucket a user's recent difficulty rating into an intensity bias."""
+    if recent_rating is None:
+        return 'neutral'
+    if recent_rating >= EASIER_ABOVE_RATING:
+        return 'easier'
+    if recent_rating <= HARDER_BELOW_RATING:
+        return 'harder'
+    return 'neutral'
+
+
+class ProgramScheduler:
+    """
+    Builds multi-week programs aligned to the user's projected cycle phases.
+
+    Each day is generated from a small set of inputs: the normalized profile,
+    that day's projected phase, whether it is a training day, the feedback
+    intensity bias and the model version. The day's content hash over those
+    inputs is both its cache key and the seed of its exercise selection, so a
+    day is a pure function of its inputs.
+
+    Regenerating a program recomputes the phase calendar (one vectorised call)
+    and the day hashes, and only builds the days whose hash is not cached. New
+    feedback only matters when it moves the user to another intensity bias. A
+    new period log rebuilds every day whose projected phase changed. Since a
+    new cycle start usually shifts the whole calendar, that is most of the
+    later days; only days that keep their phase are reused.
+
+    Day exercises have the WorkoutExerciseOut shape /api/generate-workout returns.
+
+    Day plans are shared between programs and must be treated as read-only.
+    """
+
+    def __init__(self, recommender_getter, day_cache: Optional[PlanCache] = None):
+        self._get_recommender = recommender_getter
+        self.day_cache = day_cache if day_cache is not None else PlanCache(
+            max_entries=int(os.getenv("PROGRAM_DAY_CACHE_SIZE", "20000")),
+            ttl_seconds=float(os.getenv("PROGRAM_DAY_CACHE_TTL", str(7 * 24 * 3600))),
+            variants=1,
+        )
+
+    @staticmethod
+    def day_key(shared: str, day: date, phase: Optional[str], training: bool) -> str:
+        """Content hash of a day's inputs; `shared` is the serialized program-wide inputs."""
+        return hashlib.sha256(f"{shared}|{day.isoformat()}|{phase}|{int(training)}".encode()).hexdigest()
+
+    def build_program(
+        self,
+        user_data: Dict[str, Any],
+        start_date: date,
+        weeks: int = MIN_PROGRAM_WEEKS,
+        last_period_date: Optional[date] = None,
+        cycle_length: int = 28,
+        recent_rating: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Build (or incrementally rebuild) a program of `weeks` weeks from start_date.
+
+        Without a last period date, days carry no phase and are planned like
+        a request without cycle information.
+        """
+        if not MIN_PROGRAM_WEEKS <= weeks <= MAX_PROGRAM_WEEKS:
+            raise ValueError(f"weeks must be between {MIN_PROGRAM_WEEKS} and {MAX_PROGRAM_WEEKS}")
+
+        recommender: WorkoutRecommender = self._get_recommender()
+        day_count = weeks * 7
+        if last_period_date is not None:
+            calendar = utils.get_cycle_phase_calendar(
+                [last_period_date], cycle_length, days=day_count, reference_date=start_date
+            )[0].tolist()
+        else:
+            calendar = [None] * day_count
+
+        bias = feedback_bias(recent_rating)
+        training_days = TRAINING_DAYS.get(user_data.get('fitness_level', 3), TRAINING_DAYS[3])
+        # Inputs common to every day are serialized once; each day hashes them with its own
+        shared = json.dumps([profile_key(user_data), bias, recommender.model_version], default=str)
+
+        days = []
+        built = 0
+        for offset, phase_code in enumerate(calendar):
+            day = start_date + timedelta(days=offset)
+            phase = PHASES[phase_code] if phase_code is not None else None
+            training = day.weekday() in training_days
+            key = self.day_key(shared, day, phase, training)
+            inputs = {'date': day.isoformat(), 'phase': phase, 'training': training, 'bias': bias}
+
+            def build_day(inputs=inputs, key=key):
+                nonlocal built
+                built += 1
+                return self._build_day(recommender, user_data, inputs, key)
+
+            days.append(self.day_cache.get_or_build(key, build_day))
+
+        return {
+            'startDate': start_date.isoformat(),
+            'weeks': weeks,
+            'modelVersion': recommender.model_version,
+            'intensityBias': bias,
+            'days': days,
+            'regeneratedDays': built,
+            'reusedDays': day_count - built,
+        }
+
+    def _build_day(self, recommender: WorkoutRecommender, user_data: Dict[str, Any],
+                   inputs: Dict[str, Any], key: str) -> Dict[str, Any]:
+        day = {
+            'date': inputs['date'],
+            'phase': inputs['phase'],
+            'type': 'workout' if inputs['training'] else 'rest',
+            'key': key,
+        }
+        if not inputs['training']:
+            return day
+
+        day_user = dict(user_data, cycle_phase=inputs['phase'])
+        # Seeded from the content hash: the same inputs always give the same session
+        rng = np.random.default_rng(int(key[:16], 16))
+        plan = recommender.generate_workouts([day_user], rng=rng)[0]
+
+        factor = FEEDBACK_INTENSITY[inputs['bias']]
+        exercises = plan['exercises']
+        if factor != 1.0:
+            exercises = [utils.adjust_exercise_parameters(exercise, factor) for exercise in exercises]
+        exercises = [
+            schemas.format_workout_exercise(exercise, difficulty)
+            for exercise, difficulty in zip(exercises, plan['exercise_difficulties'])
+        ]
+
+        day.update({
+            'exercises': exercises,
+            'exerciseDifficulties': plan['exercise_difficulties'],
+            'difficulty': float(plan['difficulty']),
+            'intensityAdvice': plan.get('intensity_advice'),
+        })
+        return day
+
+    def stats(self) -> Dict[str, Any]:
+        return self.day_cache.stats()
@@ -0,0 +1,74 @@
+import threading
+from typing import Callable, Optional
+
+from .engine import WorkoutRecommender
+
+
+class RecommenderProvider:
+    """
+    Process-wide holder for the shared WorkoutRecommender.
+
+    The recommender is treated as immutable once built: requests only read the
+    exercise library and the trained difficulty model. Replacing it (for example
+    after retraining) goes through swap(), which publishes a fully built instance
+    in a single reference assignment, so in-flight requests keep the instance they
+    already obtained.
+
+    Lifecycle:
+        build() -> create a new recommender without publishing it
+        warm()  -> build (if needed), run one throwaway generation, publish
+        get()   -> return the published recommender, building lazily on first use
+        swap()  -> publish a new recommender and return the previous one
+    """
+
+    def __init__(self, factory: Callable[[], WorkoutRecommender] = WorkoutRecommender):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._current: Optional[WorkoutRecommender] = None
+
+    def build(self) -> WorkoutRecommender:
+        """Build a new recommender instance without making it live."""
+        return self._factory()
+
+    def warm(self, recommender: Optional[WorkoutRecommender] = None) -> WorkoutRecommender:
+        """
+        Exercise the hot path once so the first real request does not pay for
+        lazy initialisation inside numpy/sklearn, then publish the instance.
+
+        With no instance given, the live one is warmed if there is one;
+        otherwise a new one is built and only published once it is warm.
+        """
+        if recommender is None:
+            recommender = self._current
+            if recommender is None:
+                recommender = self.build()
+        recommender.generate_workout({
+            'fitness_goal': 'General Fitness',
+            'cycle_phase': None,
+            'fitness_level': 3,
+            'available_equipment': [],
+        })
+        recommender.predict_exercise_difficulty(
+            recommender.exercise_library['strength'][0]
+        )
+        if self._current is not recommender:
+            self.swap(recommender)
+        return recommender
+
+    def get(self) -> WorkoutRecommender:
+        """Return the live recommender, building it on first use."""
+        current = self._current
+        if current is not None:
+            return current
+
+        with self._lock:
+            if self._current is None:
+                self._current = self.build()
+            return self._current
+
+    def swap(self, recommender: WorkoutRecommender) -> Optional[WorkoutRecommender]:
+        """Atomically replace the live recommender and return the previous one."""
+        with self._lock:
+            previous = self._current
+            self._current = recommender
+        return previous
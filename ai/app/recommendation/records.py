@@ -0,0 +1,152 @@
+from typing import Any, Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+class ExerciseRecord:
+    """
+    Immutable catalog entry for one exercise.
+
+    Records are shared by every request, so they cannot be modified after
+    construction; list-valued fields are stored as tuples. They support the
+    read-only mapping access (exercise['name'], exercise.get('type')) used
+    throughout the engine and utils.
+    """
+
+    __slots__ = (
+        'id',
+        'name',
+        'difficulty',
+        'target_muscles',
+        'equipment_needed',
+        'suitable_for_phases',
+        'cardio_intensity',
+        'strength_intensity',
+        'type',
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        difficulty: int = 3,
+        target_muscles: Tuple[str, ...] = (),
+        equipment_needed: Tuple[str, ...] = (),
+        suitable_for_phases: Tuple[str, ...] = (),
+        cardio_intensity: int = 1,
+        strength_intensity: int = 1,
+        type: str = 'other'
+    ):
+        init = object.__setattr__
+        init(self, 'id', id)
+        init(self, 'name', name)
+        init(self, 'difficulty', difficulty)
+        init(self, 'target_muscles', tuple(target_muscles))
+        init(self, 'equipment_needed', tuple(equipment_needed))
+        init(self, 'suitable_for_phases', tuple(suitable_for_phases))
+        init(self, 'cardio_intensity', cardio_intensity)
+        init(self, 'strength_intensity', strength_intensity)
+        init(self, 'type', type)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExerciseRecord':
+        return cls(**{key: value for key, value in data.items() if key in cls.__slots__})
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"ExerciseRecord(id={self.id!r}, name={self.name!r})"
+
+
+class PlannedExercise:
+    """
+    Per-plan overlay on a shared ExerciseRecord.
+
+    Only the prescription (sets, reps and duration in seconds) belongs to the
+    plan; every other field is read through to the record. Building a plan
+    therefore allocates one small object per exercise and never writes to the
+    catalog, which keeps concurrent requests independent.
+
+    Timed exercises carry a duration instead of reps; for compatibility with
+    the existing response format they report reps as "<duration> seconds".
+    """
+
+    __slots__ = ('record', 'sets', 'reps', 'duration')
+
+    OVERLAY_FIELDS = ('sets', 'reps', 'duration')
+
+    def __init__(
+        self,
+        record: ExerciseRecord,
+        sets: Optional[int] = None,
+        reps: Optional[int] = None,
+        duration: Optional[int] = None
+    ):
+        self.record = record
+        self.sets = sets
+        self.reps = reps
+        self.duration = duration
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def _lookup(self, key: str) -> Any:
+        if key == 'reps':
+            if self.reps is not None:
+                return self.reps
+            if self.duration is not None:
+                return f"{self.duration} seconds"
+            return _MISSING
+        if key in self.OVERLAY_FIELDS:
+            value = getattr(self, key)
+            return _MISSING if value is None else value
+        return self.record.get(key, _MISSING)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.OVERLAY_FIELDS:
+            raise KeyError(f"Only {', '.join(self.OVERLAY_FIELDS)} can be set on a planned exercise")
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def copy(self) -> 'PlannedExercise':
+        return PlannedExercise(self.record, self.sets, self.reps, self.duration)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.record.to_dict()
+        data['sets'] = self.sets
+        data['reps'] = self.get('reps')
+        if self.duration is not None:
+            data['duration'] = self.duration
+        return data
+
+    def __repr__(self) -> str:
+        return f"PlannedExercise({self.record.name!r}, sets={self.sets!r}, reps={self.get('reps')!r})"
@@ -0,0 +1,440 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..logs import get_event_logger
+from .engine import WorkoutRecommender
+from .model_store import (
+    TRAINING_LABELS,
+    TRAINING_SAMPLES,
+    get_model_path,
+    load_model_artifact,
+    save_model_artifact,
+    train_difficulty_model,
+)
+from .provider import RecommenderProvider
+
+log = get_event_logger(__name__)
+
+# Every HOLDOUT_EVERY-th feedback sample is kept out of training and used to
+# compare the candidate against the live model
+HOLDOUT_EVERY = 5
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+async def load_rated_feedback(db: AsyncSession, limit: int) -> List[Tuple[List[Dict[str, Any]], int]]:
+    """The exercises and difficulty rating of the most recently rated workout plans."""
+    result = await db.execute(
+        select(models.WorkoutPlan.exercises, models.WorkoutPlan.difficulty_rating)
+        .where(models.WorkoutPlan.difficulty_rating.isnot(None))
+        .order_by(models.WorkoutPlan.id.desc())
+        .limit(limit)
+    )
+    # Oldest first, so replaying them keeps the newest ones in the bounded buffer
+    return [(exercises or [], rating) for exercises, rating in reversed(result.all())]
+
+
+class ModelRetrainer:
+    """
+    Retrains the difficulty model from user ratings in a background thread and
+    publishes accepted models through the RecommenderProvider.
+
+    Ratings are only appended to an in-memory buffer on the request path. The
+    worker wakes up after `min_new_ratings` new ratings, every `interval_seconds`
+    if anything new arrived, or when a retrain is requested explicitly. It trains
+    on the built-in samples plus the rated exercises (each exercise of a rated
+    plan is labelled with the plan's rating), validates the candidate and swaps
+    in a new recommender built with WorkoutRecommender.with_model(). Requests
+    never wait on training: they keep using the instance they already hold.
+
+    A candidate is accepted only if it still classifies the built-in samples with
+    at least `min_seed_accuracy` and, on held-out feedback, is no more than
+    `holdout_tolerance` less accurate than the live model. The last
+    `history_size` replaced recommenders are kept for rollback().
+
+    With several worker processes only one of them retrains: start() takes an
+    exclusive lock on `lock_path` (by default next to the model artifact), and
+    the process holding it is the leader. If the lock file cannot be created
+    (a read-only deploy), the process only follows the artifact. The leader
+    writes every promoted (or rolled back) model to the artifact, and the other
+    workers reload it within `sync_seconds`, so all workers serve the same model
+    version. Given a feedback_loader, the leader reads the ratings from the
+    database when it starts and before each run, which includes the ratings
+    submitted through the other workers; nothing is trained while there are none.
+
+    Retraining is off unless RETRAIN_ENABLED is set. Promoting a model replaces
+    the artifact, which makes a preload bundle built from it stale: workers
+    started afterwards ignore the bundle and load the artifact (see preload.py),
+    until the bundle is rebuilt with `python -m app.recommendation.preload`.
+    """
+
+    def __init__(
+        self,
+        provider: RecommenderProvider,
+        min_new_ratings: int = 50,
+        interval_seconds: float = 3600,
+        max_ratings: int = 50000,
+        history_size: int = 3,
+        min_seed_accuracy: float = 0.8,
+        holdout_tolerance: float = 0.02,
+        enabled: bool = True,
+        model_path: Optional[Path] = None,
+        sync_seconds: float = 30,
+        lock_path: Optional[Path] = None
+    ):
+        self.provider = provider
+        self.min_new_ratings = min_new_ratings
+        self.interval_seconds = interval_seconds
+        self.max_ratings = max_ratings
+        self.min_seed_accuracy = min_seed_accuracy
+        self.holdout_tolerance = holdout_tolerance
+        self.enabled = enabled
+        self.model_path = Path(model_path) if model_path is not None else get_model_path()
+        self.sync_seconds = sync_seconds
+        self.lock_path = (
+            Path(lock_path) if lock_path is not None
+            else self.model_path.with_name(self.model_path.name + ".retrain.lock")
+        )
+        # True in the process that retrains, False in the others; None until started
+        self.leader: Optional[bool] = None
+
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._leader_lock_file = None
+        self._feedback_loader: Optional[Callable[[], List[Tuple[List[Dict[str, Any]], int]]]] = None
+        # The ratings behind the live model; none for the model a process starts with
+        self._trained_ratings: List = []
+        self._artifact_mtime: Optional[int] = None
+
+        self._ratings: Deque[Tuple[Tuple[Dict[str, Any], ...], int]] = deque(maxlen=max_ratings)
+        self._pending = 0
+        self._forced = False
+        self._history: Deque[WorkoutRecommender] = deque(maxlen=history_size)
+        self.runs = 0
+        self.promotions = 0
+        self.rejections = 0
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_env(cls, provider: RecommenderProvider) -> 'ModelRetrainer':
+        return cls(
+            provider,
+            min_new_ratings=int(os.getenv("RETRAIN_MIN_RATINGS", "50")),
+            interval_seconds=float(os.getenv("RETRAIN_INTERVAL_SECONDS", "3600")),
+            max_ratings=int(os.getenv("RETRAIN_MAX_RATINGS", "50000")),
+            history_size=int(os.getenv("RETRAIN_HISTORY", "3")),
+            min_seed_accuracy=float(os.getenv("RETRAIN_MIN_SEED_ACCURACY", "0.8")),
+            holdout_tolerance=float(os.getenv("RETRAIN_HOLDOUT_TOLERANCE", "0.02")),
+            enabled=_env_bool("RETRAIN_ENABLED", False),
+            sync_seconds=float(os.getenv("RETRAIN_SYNC_SECONDS", "30")),
+            lock_path=os.getenv("RETRAIN_LOCK_PATH") or None,
+        )
+
+    def add_feedback(self, exercises: Optional[List[Dict[str, Any]]], rating: Optional[int]) -> None:
+        """Record a rated workout plan; cheap enough to call on the request path."""
+        if not exercises or rating is None:
+            return
+        with self._lock:
+            self._ratings.append((tuple(exercises), int(rating)))
+            self._pending += 1
+            due = self._pending >= self.min_new_ratings
+        if due:
+            self._wake.set()
+
+    def request_retrain(self) -> None:
+        """Ask the worker to retrain as soon as possible, even without new ratings."""
+        with self._lock:
+            self._forced = True
+        self._wake.set()
+
+    def start(
+        self,
+        feedback_loader: Optional[Callable[[], List[Tuple[List[Dict[str, Any]], int]]]] = None
+    ) -> None:
+        """
+        Start the worker thread.
+
+        Args:
+            feedback_loader: Returns all rated plans as (exercises, rating), oldest
+                first; called on the worker thread before each training run
+        """
+        if not self.enabled or self._thread is not None:
+            return
+        self._feedback_loader = feedback_loader
+        self.leader = self._acquire_leadership()
+        self._artifact_mtime = self._artifact_stat()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="model-retrainer", daemon=True)
+        self._thread.start()
+        if self.leader and feedback_loader is not None:
+            # Train on the ratings stored before this start, if there are any
+            self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the worker; a training run in progress is allowed to finish."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout)
+        if self._leader_lock_file is not None:
+            # Closing the file releases the lock; another worker can take over on its next start
+            self._leader_lock_file.close()
+            self._leader_lock_file = None
+
+    def _acquire_leadership(self) -> bool:
+        """Take the retraining lock without waiting; False if another process holds it."""
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows): a single process is assumed
+            return True
+
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(self.lock_path, 'a')
+        except OSError as e:
+            log.warning("model.retrain_lock_unavailable", lock_path=str(self.lock_path), error=str(e))
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._leader_lock_file = lock_file
+        return True
+
+    def _artifact_stat(self) -> Optional[int]:
+        try:
+            return os.stat(self.model_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval_seconds if self.leader else self.sync_seconds)
+            self._wake.clear()
+            if self._stopping:
+                return
+            if not self.leader:
+                try:
+                    self.sync_from_artifact()
+                except Exception:
+                    log.exception("model.reload_failed", model_path=str(self.model_path))
+                continue
+            with self._lock:
+                # With a loader, ratings sent to other workers are only seen in the database
+                due = self._forced or self._pending > 0 or self._feedback_loader is not None
+            if not due:
+                continue
+            try:
+                self.retrain_once()
+            except Exception:
+                log.exception("model.retrain_failed")
+
+    def sync_from_artifact(self) -> Optional[str]:
+        """
+        Publish the model in the artifact if the leader replaced it.
+
+        Returns:
+            The newly published model version, or None if nothing changed.
+        """
+        mtime = self._artifact_stat()
+        if mtime is None or mtime == self._artifact_mtime:
+            return None
+        self._artifact_mtime = mtime
+        artifact = load_model_artifact(self.model_path)
+        current = self.provider.get()
+        if artifact is None or artifact['version'] == current.model_version:
+            return None
+
+        self.provider.swap(current.with_model(artifact['model'], artifact['version']))
+        log.info("model.reloaded", version=artifact['version'], previous_version=current.model_version)
+        return artifact['version']
+
+    def _training_data(self, recommender: WorkoutRecommender, ratings) -> Tuple[List, List, List, List]:
+        """
+        Feature rows for the rated exercises, split into training and holdout sets.
+
+        Stored plans only carry the exercise fields sent to the frontend, so
+        exercises are matched to the catalog by id or name to recover their
+        intensities; unknown exercises use the stored fields as they are.
+        """
+        records = recommender.catalog.records
+        by_id = {record.id: record for record in records}
+        by_name = {record.name: record for record in records}
+
+        train_X, train_y, holdout_X, holdout_y = [], [], [], []
+        sample_index = 0
+        for exercises, rating in ratings:
+            label = min(max(rating, 1), 5)
+            for exercise in exercises:
+                if not isinstance(exercise, dict):
+                    continue
+                record = by_id.get(exercise.get('id')) or by_name.get(exercise.get('name')) or exercise
+                features = recommender.get_exercise_features(record)
+                if sample_index % HOLDOUT_EVERY == 0:
+                    holdout_X.append(features)
+                    holdout_y.append(label)
+                else:
+                    train_X.append(features)
+                    train_y.append(label)
+                sample_index += 1
+        return train_X, train_y, holdout_X, holdout_y
+
+    @staticmethod
+    def _accuracy(model, X, y) -> Optional[float]:
+        if not len(X):
+            return None
+        return float(np.mean(model.predict(np.array(X)) == np.array(y)))
+
+    def retrain_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Train, validate and (if accepted) publish a candidate model. Runs on the caller's thread.
+
+        Returns:
+            The run's result, or None when the ratings have not changed since the
+            last run and no retrain was requested.
+        """
+        start = time.perf_counter()
+        if self._feedback_loader is not None:
+            loaded = self._feedback_loader()
+            with self._lock:
+                self._ratings.clear()
+                self._ratings.extend((tuple(exercises), int(rating)) for exercises, rating in loaded if exercises)
+        with self._lock:
+            ratings = list(self._ratings)
+            forced = self._forced
+            self._pending = 0
+            self._forced = False
+        if not forced and ratings == self._trained_ratings:
+            return None
+        self._trained_ratings = ratings
+
+        current = self.provider.get()
+        train_X, train_y, holdout_X, holdout_y = self._training_data(current, ratings)
+        model, fingerprint = train_difficulty_model(
+            TRAINING_SAMPLES + train_X, TRAINING_LABELS + train_y
+        )
+        version = f"{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{fingerprint}"
+
+        seed_accuracy = self._accuracy(model, TRAINING_SAMPLES, TRAINING_LABELS)
+        holdout_accuracy = self._accuracy(model, holdout_X, holdout_y)
+        current_holdout_accuracy = self._accuracy(current.difficulty_model, holdout_X, holdout_y)
+
+        reasons = []
+        if seed_accuracy < self.min_seed_accuracy:
+            reasons.append(f"seed accuracy {seed_accuracy:.3f} < {self.min_seed_accuracy}")
+        if holdout_accuracy is not None and holdout_accuracy < current_holdout_accuracy - self.holdout_tolerance:
+            reasons.append(
+                f"holdout accuracy {holdout_accuracy:.3f} < live model {current_holdout_accuracy:.3f}"
+            )
+
+        status = "rejected" if reasons else "promoted"
+        if (current.model_version or "").endswith(f"-{fingerprint}"):
+            # Same training data and parameters: the live model is this model
+            status, reasons, version = "unchanged", [], current.model_version
+        elif not reasons:
+            # Everything expensive happens before the swap: table, catalog scores
+            candidate = current.with_model(model, version)
+            with self._swap_lock:
+                if self.provider.get() is not current:
+                    status, reasons = "stale", ["live model changed during training"]
+                else:
+                    # Written first, so the other workers follow the model published here
+                    self._publish_artifact(model, version)
+                    self._history.append(self.provider.swap(candidate))
+
+        result = {
+            'status': status,
+            'version': version,
+            'previous_version': current.model_version,
+            'ratings': len(ratings),
+            'training_samples': len(TRAINING_SAMPLES) + len(train_X),
+            'holdout_samples': len(holdout_X),
+            'seed_accuracy': seed_accuracy,
+            'holdout_accuracy': holdout_accuracy,
+            'live_holdout_accuracy': current_holdout_accuracy,
+            'reasons': reasons,
+            'elapsed_seconds': time.perf_counter() - start,
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self.runs += 1
+            if status == "promoted":
+                self.promotions += 1
+            elif status != "unchanged":
+                self.rejections += 1
+            self.last_result = result
+
+        log.info(
+            "model.retrain", status=status, version=version, previous_version=current.model_version,
+            ratings=len(ratings), reasons=reasons, elapsed_seconds=round(result['elapsed_seconds'], 3)
+        )
+        return result
+
+    def rollback(self) -> Optional[str]:
+        """
+        Republish the recommender that was live before the last promotion.
+
+        Returns:
+            The restored model version, or None if there is nothing to roll back to.
+        """
+        if self.leader is False:
+            # The other workers follow the leader's artifact; rolling back here would not last
+            return None
+        with self._swap_lock:
+            if not self._history:
+                return None
+            previous = self._history.pop()
+            self._publish_artifact(previous.difficulty_model, previous.model_version)
+            self.provider.swap(previous)
+        log.info("model.rolled_back", version=previous.model_version)
+        return previous.model_version
+
+    def _publish_artifact(self, model, version: str) -> None:
+        """Write the model the leader publishes to the artifact the other workers reload."""
+        if self.leader:
+            save_model_artifact(model, version.rsplit('-', 1)[-1], self.model_path, version=version)
+            self._artifact_mtime = self._artifact_stat()
+
+    def status(self) -> Dict[str, Any]:
+        with self._swap_lock:
+            rollback_versions = [r.model_version for r in reversed(self._history)]
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'running': self._thread is not None and self._thread.is_alive(),
+                'role': None if self.leader is None else ('leader' if self.leader else 'follower'),
+                'model_path': str(self.model_path),
+                'lock_path': str(self.lock_path),
+                'live_version': self.provider.get().model_version,
+                'rollback_versions': rollback_versions,
+                'buffered_ratings': len(self._ratings),
+                'pending_ratings': self._pending,
+                'min_new_ratings': self.min_new_ratings,
+                'interval_seconds': self.interval_seconds,
+                'runs': self.runs,
+                'promotions': self.promotions,
+                'rejections': self.rejections,
+                'last_result': self.last_result,
+            }
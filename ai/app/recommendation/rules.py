@@ -0,0 +1,184 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .catalog import PHASES
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / "rules.json"
+
+# Rows of the per-phase tables: one per known phase, then these two
+UNKNOWN_PHASE = len(PHASES)      # a phase string that is not in PHASES
+NO_PHASE = len(PHASES) + 1       # no cycle tracking: no phase adjustments at all
+
+# Columns of RuleTable.intensity
+SETS_MODIFIER, REPS_MODIFIER, CARDIO_DURATION_MODIFIER = range(3)
+
+
+def get_rules_path() -> Path:
+    """Location of the rule file, overridable via WORKOUT_RULES_PATH."""
+    return Path(os.getenv("WORKOUT_RULES_PATH", str(DEFAULT_RULES_PATH)))
+
+
+class RuleTable:
+    """
+    Goal, phase and exercise-type rules compiled into integer-indexed tables.
+
+    Goals, phases and workout types are mapped to integer indices once. The
+    split modifiers are (goals, phases, types) arrays, and every phase-adjusted
+    split is computed for every goal/phase pair when the table is built, so a
+    request only does index lookups. Advice and recommendation texts are
+    stored once per index and never rebuilt.
+
+    The source is a JSON document (see rules.json); editing it changes the
+    rules without a code change. Compiled values are shared and read-only.
+    """
+
+    def __init__(self, rules: Dict[str, Any]):
+        self.types: Tuple[str, ...] = tuple(rules['workout_types'])
+        self.type_index = {name: index for index, name in enumerate(self.types)}
+        self.phase_index = {phase: index for index, phase in enumerate(PHASES)}
+        self.goal_index = {goal: index for index, goal in enumerate(rules['goal_splits'])}
+        default_goal = len(self.goal_index)
+        phase_rows = len(PHASES) + 2
+
+        # (goals + default, types) shares, and the type order each goal lists them in
+        goal_specs = list(rules['goal_splits'].values()) + [rules['default_split']]
+        self.goal_splits = np.zeros((len(goal_specs), len(self.types)))
+        self.goal_orders: List[Tuple[int, ...]] = []
+        for row, split in enumerate(goal_specs):
+            order = tuple(self._type(name) for name in split)
+            self.goal_orders.append(order)
+            self.goal_splits[row, list(order)] = list(split.values())
+
+        # (phases + unknown + none, types) multipliers; the last two rows use the defaults
+        self.split_factors = np.ones((phase_rows, len(self.types)))
+        self.added_recovery = np.zeros(phase_rows)
+        for phase, row in self.phase_index.items():
+            self._fill(self.split_factors[row], rules['phase_split_factors'].get(phase, rules['default_split_factors']))
+            self.added_recovery[row] = rules.get('phase_added_recovery', {}).get(phase, 0.0)
+        self._fill(self.split_factors[UNKNOWN_PHASE], rules['default_split_factors'])
+
+        # Every goal x phase split, adjusted and normalised up front
+        adjusted = self.goal_splits[:, np.newaxis, :] * self.split_factors[np.newaxis, :, :]
+        self.splits = [
+            [self._compile_split(goal, phase, adjusted[goal, phase]) for phase in range(phase_rows)]
+            for goal in range(default_goal + 1)
+        ]
+        self._default_goal = default_goal
+
+        # Default sets/reps/duration per workout type (the last row is for unlisted types)
+        prescriptions = rules['prescriptions']
+        default_prescription = rules['default_prescription']
+        self.prescriptions = [
+            (spec.get('sets'), spec.get('reps'), spec.get('duration'))
+            for spec in [prescriptions.get(name, default_prescription) for name in self.types] + [default_prescription]
+        ]
+
+        # (phases + unknown, 3) intensity modifiers and their advice text
+        intensity_specs = [rules['phase_intensity'].get(phase, rules['default_intensity']) for phase in PHASES]
+        intensity_specs.append(rules['default_intensity'])
+        self.intensity = np.array([
+            [spec['sets_modifier'], spec['reps_modifier'], spec['cardio_duration_modifier']]
+            for spec in intensity_specs
+        ])
+        self.intensity_advice = [spec['intensity_advice'] for spec in intensity_specs]
+
+        self.recommendations = [
+            rules['phase_recommendations'].get(phase, rules['default_recommendations']) for phase in PHASES
+        ] + [rules['default_recommendations']]
+
+        # General advice per phase, with the exercise-specific sentence appended where there is one
+        general = rules['phase_advice']
+        self.default_advice = rules['default_phase_advice']
+        self.advice: Dict[Tuple[Optional[str], Optional[str]], str] = {}
+        for phase in set(general) | set(PHASES):
+            base = general.get(phase, self.default_advice)
+            self.advice[(phase, None)] = base
+            for exercise_type, by_phase in rules['exercise_phase_advice'].items():
+                specific = by_phase.get(phase, "")
+                self.advice[(phase, exercise_type)] = f"{base} {specific}" if specific else base
+
+    def _type(self, name: str) -> int:
+        if name not in self.type_index:
+            raise ValueError(f"Unknown workout type {name!r} in workout rules")
+        return self.type_index[name]
+
+    def _fill(self, row: np.ndarray, factors: Dict[str, float]) -> None:
+        for name, factor in factors.items():
+            row[self._type(name)] = factor
+
+    def _compile_split(self, goal: int, phase: int, adjusted: np.ndarray) -> Dict[str, float]:
+        """Final type shares for one goal/phase pair, in the goal's type order."""
+        order = self.goal_orders[goal]
+        if phase == NO_PHASE:
+            return {self.types[t]: float(self.goal_splits[goal, t]) for t in order}
+
+        split = {self.types[t]: float(adjusted[t]) for t in order}
+        if self.added_recovery[phase] > 0 and 'recovery' not in split:
+            split['recovery'] = float(self.added_recovery[phase])
+
+        # Summed in insertion order, like the dict-based rules this replaces
+        total = sum(split.values())
+        if total > 0:
+            split = {name: share / total for name, share in split.items()}
+        return split
+
+    def phase_row(self, phase: Optional[str]) -> int:
+        if not phase:
+            return NO_PHASE
+        return self.phase_index.get(phase, UNKNOWN_PHASE)
+
+    def workout_split(self, goal: str, phase: Optional[str]) -> Dict[str, float]:
+        """Type shares for a goal, adjusted for the phase. The returned dict is shared."""
+        return self.splits[self.goal_index.get(goal, self._default_goal)][self.phase_row(phase)]
+
+    def adjust_split(self, split: Dict[str, float], phase: str) -> Dict[str, float]:
+        """Apply a phase's split factors to an arbitrary split and renormalise."""
+        row = self.phase_row(phase or 'unknown')
+        factors = self.split_factors[row]
+        adjusted = {
+            name: share * (factors[self.type_index[name]] if name in self.type_index else 1.0)
+            for name, share in split.items()
+        }
+        if self.added_recovery[row] > 0 and 'recovery' not in adjusted:
+            adjusted['recovery'] = float(self.added_recovery[row])
+        total = sum(adjusted.values())
+        if total > 0:
+            adjusted = {name: share / total for name, share in adjusted.items()}
+        return adjusted
+
+    def prescription(self, exercise_type: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """Default (sets, reps, duration) for an exercise type."""
+        return self.prescriptions[self.type_index.get(exercise_type, len(self.types))]
+
+    def intensity_row(self, phase: str) -> Tuple[np.ndarray, str]:
+        """Intensity modifiers and advice for a tracked phase (unknown phases get the defaults)."""
+        row = self.phase_index.get(phase, UNKNOWN_PHASE)
+        return self.intensity[row], self.intensity_advice[row]
+
+    def phase_recommendations(self, phase: str) -> Dict[str, str]:
+        """Workout, nutrition and recovery recommendations. The returned dict is shared."""
+        return self.recommendations[self.phase_index.get(phase, UNKNOWN_PHASE)]
+
+    def phase_advice(self, phase: Optional[str], exercise_type: Optional[str] = None) -> str:
+        advice = self.advice.get((phase, exercise_type))
+        if advice is None:
+            advice = self.advice.get((phase, None), self.default_advice)
+        return advice
+
+
+def load_rules(path: Optional[Path] = None) -> RuleTable:
+    """Read and compile a rule file."""
+    path = Path(path) if path is not None else get_rules_path()
+    with open(path, encoding='utf-8') as f:
+        return RuleTable(json.load(f))
+
+
+@lru_cache(maxsize=None)
+def default_rules() -> RuleTable:
+    """The rule table from WORKOUT_RULES_PATH (or the bundled rules.json), loaded once per process."""
+    return load_rules()
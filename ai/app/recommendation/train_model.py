@@ -0,0 +1,33 @@
+"""
+Offline training entry point for the exercise difficulty model.
+
+Run from the ai/ directory:
+    python -m app.recommendation.train_model [--output PATH]
+"""
+import argparse
+import time
+
+from .model_store import get_model_path, load_model_artifact, save_model_artifact, train_difficulty_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train and save the difficulty model artifact")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Artifact path (defaults to DIFFICULTY_MODEL_PATH or artifacts/difficulty_model.joblib)"
+    )
+    args = parser.parse_args()
+    path = args.output or get_model_path()
+
+    model, fingerprint = train_difficulty_model()
+    artifact = save_model_artifact(model, fingerprint, path)
+    print(f"Wrote difficulty model {artifact['version']} to {path}")
+
+    start = time.perf_counter()
+    load_model_artifact(path)
+    print(f"Load time: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Union
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+# First day-of-cycle of each phase after menstrual (follicular, ovulation, luteal);
+# the vectorised phase functions return indices into PHASES in
+# app/recommendation/catalog.py
+PHASE_START_DAYS = np.array([5, 14, 17])
+
+DateLike = Union[date, datetime, np.datetime64, str]
 
 def calculate_workout_difficulty(user_metrics: Dict, exercise_list: List[Dict]) -> float:
     """Calculate overall workout difficulty based on exercises and user metrics."""
@@ -8,9 +15,9 @@ def calculate_workout_difficulty(user_metrics: Dict, exercise_list: List[Dict])
     fitness_modifier = user_metrics['fitness_level'] / 5  # Assuming fitness_level is 1-5
     return base_difficulty * (1 / fitness_modifier)
 
-def get_cycle_phase(last_period_date: datetime, cycle_length: int = 28) -> str:
+def get_cycle_phase(last_period_date: datetime, cycle_length: int = 28, today: Optional[datetime] = None) -> str:
     """Calculate current menstrual cycle phase based on last period date."""
-    today = datetime.now()
+    today = today or datetime.now()
     days_since_period = (today - last_period_date).days % cycle_length
     
     if days_since_period < 5:
@@ -22,9 +29,69 @@ def get_cycle_phase(last_period_date: datetime, cycle_length: int = 28) -> str:
     else:
         return "luteal"
 
+def days_since_period(last_period_dates: Sequence[DateLike], reference_date: Optional[DateLike] = None) -> np.ndarray:
+    """
+    Whole days from each last-period date to the reference date (default: now).
+    
+    Rounds down like timedelta.days, so the result matches get_cycle_phase.
+    """
+    reference = np.datetime64(reference_date if reference_date is not None else datetime.now(), 'us')
+    starts = np.asarray(last_period_dates, dtype='datetime64[us]')
+    return ((reference - starts) // np.timedelta64(1, 'D')).astype(np.int32)
+
+def cycle_phase_codes(days: np.ndarray, cycle_lengths: Union[int, Sequence[int], np.ndarray] = 28) -> np.ndarray:
+    """Phase index (into catalog.PHASES) for each day count, broadcast against the cycle lengths."""
+    cycle_lengths = np.asarray(cycle_lengths, dtype=np.int32)
+    if np.any(cycle_lengths <= 0):
+        raise ValueError("cycle lengths must be positive")
+    day_of_cycle = np.mod(days, cycle_lengths)
+    # Phase of every possible day of the cycle, then one gather for all users and days
+    phase_by_day = np.searchsorted(PHASE_START_DAYS, np.arange(cycle_lengths.max()), side='right').astype(np.int8)
+    return phase_by_day[day_of_cycle]
+
+def get_cycle_phases(
+    last_period_dates: Sequence[DateLike],
+    cycle_lengths: Union[int, Sequence[int], np.ndarray] = 28,
+    reference_date: Optional[DateLike] = None
+) -> np.ndarray:
+    """
+    Vectorised get_cycle_phase: today's phase code for every user.
+    
+    Args:
+        last_period_dates: one date per user, e.g. MenstrualCycleLog.start_date
+        cycle_lengths: one cycle length per user, or a single length for all
+        reference_date: the date treated as today; defaults to now
+    
+    Returns:
+        int8 array of indices into catalog.PHASES (app/recommendation/catalog.py)
+    """
+    return cycle_phase_codes(days_since_period(last_period_dates, reference_date), cycle_lengths)
+
+def get_cycle_phase_calendar(
+    last_period_dates: Sequence[DateLike],
+    cycle_lengths: Union[int, Sequence[int], np.ndarray] = 28,
+    days: int = 28,
+    reference_date: Optional[DateLike] = None
+) -> np.ndarray:
+    """
+    Phase codes for each user over the next `days` days, starting at the reference date.
+    
+    Returns:
+        int8 array of shape (users, days) of indices into catalog.PHASES
+        (app/recommendation/catalog.py); column 0 equals get_cycle_phases()
+    """
+    start = days_since_period(last_period_dates, reference_date)
+    day_counts = start[:, np.newaxis] + np.arange(days, dtype=np.int32)
+    lengths = np.asarray(cycle_lengths, dtype=np.int32)
+    if lengths.ndim:
+        lengths = lengths[:, np.newaxis]
+    return cycle_phase_codes(day_counts, lengths)
+
 def adjust_exercise_parameters(exercise: Dict, intensity_modifier: float) -> Dict:
     """Adjust exercise parameters based on intensity modifier."""
     adjusted = exercise.copy()
     adjusted['sets'] = max(1, round(exercise['sets'] * intensity_modifier))
-    adjusted['reps'] = max(1, round(exercise['reps'] * intensity_modifier))
+    # Timed exercises report reps as "<n> seconds"; only counted reps are scaled
+    if isinstance(exercise.get('reps'), int):
+        adjusted['reps'] = max(1, round(exercise['reps'] * intensity_modifier))
     return adjusted
\ No newline at end of file
@@ -0,0 +1,40 @@
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from starlette.background import BackgroundTask
+
+# NumPy scalars and arrays (np.float64 difficulties, np.int64 counts) are encoded natively
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as JSON the same way FastJSONResponse does."""
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    orjson response, returned directly by endpoints to skip jsonable_encoder.
+
+    Endpoints still declare a response_model for the OpenAPI schema, but the
+    content is not validated against it: it must already be made of plain
+    Python or NumPy values. Content that is already encoded (bytes, e.g. a
+    cached body from dumps) is sent as is.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None
+    ):
+        # Spelled out so FastAPI can read the default status code for the OpenAPI schema
+        super().__init__(content, status_code, headers, media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
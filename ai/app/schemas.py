@@ -1,7 +1,23 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
-from . import main
+
+def transform_fitness_level(level: str) -> int:
+    levels = {
+        'Beginner': 1,
+        'Intermediate': 2,
+        'Advanced': 3
+    }
+    return levels.get(level, 1)
+
+def transform_activity_level(level: str) -> str:
+    levels = {
+        'Sedentary (Little to no exercise)': 'beginner',
+        'Lightly Active (1-3 workouts per week)': 'intermediate',
+        'Moderately Active (4-5 workouts per week)': 'advanced',
+        'Very Active (Daily intense workouts)': 'expert'
+    }
+    return levels.get(level, 'intermediate')
 
 class UserSync(BaseModel):
     id: int
@@ -14,6 +30,9 @@ class UserSync(BaseModel):
     class Config:
         orm_mode = True
 
+class BulkUserSync(BaseModel):
+    users: List[UserSync]
+
 class WorkoutRequestFromFrontend(BaseModel):
     userId: Optional[str] = None
     fitnessGoal: str
@@ -39,8 +58,8 @@ class WorkoutRequestFromFrontend(BaseModel):
             cycle_phase=self.menstrualCyclePhase,
             energy_level=5,  # Default energy level
             preferred_duration=None,  # Default to None
-            fitness_level=main.transform_fitness_level(self.fitnessLevel),
-            activity_level=main.transform_activity_level(self.activityLevel),
+            fitness_level=transform_fitness_level(self.fitnessLevel),
+            activity_level=transform_activity_level(self.activityLevel),
             diet_type=self.dietType,
             weight=float(self.weight) if self.weight else None,
             height=float(self.height) if self.height else None,
@@ -48,6 +67,13 @@ class WorkoutRequestFromFrontend(BaseModel):
             allergies=self.allergies
         )
 
+class WorkoutBatchRequest(BaseModel):
+    users: List[WorkoutRequestFromFrontend]
+
+class ProgramRequest(WorkoutRequestFromFrontend):
+    weeks: int = Field(4, ge=4, le=8)
+    startDate: Optional[str] = None  # ISO date; defaults to today
+
 class UserBase(BaseModel):
     username: str
     email: EmailStr
@@ -96,10 +122,46 @@ class WorkoutPlanResponse(BaseModel):
     difficulty: float
     estimated_duration: int
 
+class WorkoutExerciseOut(BaseModel):
+    name: str
+    sets: int
+    reps: Union[int, str]  # "<n> seconds" for timed exercises
+    duration: str
+    intensity: str
+    type: str
+    target_muscles: List[str]
+    equipment_needed: List[str]
+
+def format_workout_exercise(exercise: Any, difficulty: int) -> Dict[str, Any]:
+    """One planned exercise and its predicted difficulty in the WorkoutExerciseOut shape."""
+    return {
+        "name": exercise.get('name', ''),
+        "sets": exercise.get('sets', 3),
+        "reps": exercise.get('reps', 12),
+        "duration": "30 mins",  # Default duration
+        "intensity": f"Level {difficulty}/5",
+        "type": exercise.get('type', 'strength'),
+        "target_muscles": list(exercise.get('target_muscles', [])),
+        "equipment_needed": list(exercise.get('equipment_needed', []))
+    }
+
+class PhaseRecommendations(BaseModel):
+    workout: str
+    nutrition: str
+    recovery: str
+
+class GenerateWorkoutResponse(BaseModel):
+    workoutPlan: List[WorkoutExerciseOut]
+    difficulty: float
+    modelVersion: Optional[str] = None
+    # Only present when a cycle phase was sent
+    intensityAdvice: Optional[str] = None
+    phaseRecommendations: Optional[PhaseRecommendations] = None
+
 class WorkoutFeedback(BaseModel):
     workout_id: int
     completed_exercises: List[int]
-    difficulty_rating: int
+    difficulty_rating: int = Field(ge=1, le=5)
     energy_level: int
     feedback: Optional[str]
 
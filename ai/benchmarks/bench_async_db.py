@@ -0,0 +1,121 @@
+"""
+Throughput of concurrent request handlers against an artificially slow database,
+comparing a synchronous Session used inside `async def` (the old get_db) with the
+AsyncSession path from app.database.
+
+Each handler makes one slow round trip and then runs the same user lookup as
+/api/sync-user. The slow round trip calls a `slow()` SQL function registered on
+the SQLite connection that sleeps --delay-ms inside the driver, standing in for a
+slow Postgres round trip. With the sync session that sleep runs on the event loop
+thread and serializes every in-flight request; with aiosqlite it runs in the
+driver's worker thread while the loop keeps serving other requests.
+
+Run from the ai/ directory:
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 20 --delay-ms 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+
+
+def register_slow_function(engine, delay_ms: float) -> None:
+    def slow(_):
+        time.sleep(delay_ms / 1000)
+        return 0
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # aiosqlite wraps the sqlite3 connection; create_function is proxied to its thread
+        dbapi_connection.create_function("slow", 1, slow)
+
+
+# Simulated network/server latency, then the same lookup as /api/sync-user
+SLOW_ROUND_TRIP = select(func.slow(0))
+
+
+def lookup_statement(user_id: int):
+    return select(models.User).where(models.User.id == user_id)
+
+
+async def run_sync_session(url: str, args) -> float:
+    engine = create_engine(url, pool_size=args.concurrency, max_overflow=0)
+    register_slow_function(engine, args.delay_ms)
+    SessionLocal = sessionmaker(bind=engine)
+
+    async def handler(user_id: int):
+        db = SessionLocal()
+        try:
+            db.execute(SLOW_ROUND_TRIP)
+            db.execute(lookup_statement(user_id)).scalar_one_or_none()
+        finally:
+            db.close()
+
+    elapsed = await drive(handler, args)
+    engine.dispose()
+    return elapsed
+
+
+async def run_async_session(url: str, args) -> float:
+    engine = create_async_engine(url, pool_size=args.concurrency, max_overflow=0)
+    register_slow_function(engine.sync_engine, args.delay_ms)
+    SessionLocal = async_sessionmaker(bind=engine)
+
+    async def handler(user_id: int):
+        async with SessionLocal() as db:
+            await db.execute(SLOW_ROUND_TRIP)
+            (await db.execute(lookup_statement(user_id))).scalar_one_or_none()
+
+    elapsed = await drive(handler, args)
+    await engine.dispose()
+    return elapsed
+
+
+async def drive(handler, args) -> float:
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(user_id: int):
+        async with semaphore:
+            await handler(user_id)
+
+    # Warm the pool before timing
+    await asyncio.gather(*(one(i) for i in range(args.concurrency)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--delay-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup = create_engine(f"sqlite:///{path}")
+        models.Base.metadata.create_all(setup)
+        setup.dispose()
+
+        for label, runner, url in (
+            ('sync Session (before)', run_sync_session, f"sqlite:///{path}"),
+            ('AsyncSession (after)', run_async_session, f"sqlite+aiosqlite:///{path}"),
+        ):
+            elapsed = asyncio.run(runner(url, args))
+            print(
+                f"{label:<24} requests={args.requests} concurrency={args.concurrency} "
+                f"delay={args.delay_ms:.0f} ms  {args.requests / elapsed:8.1f} req/s  ({elapsed:.2f} s)"
+            )
+
+
+if __name__ == '__main__':
+    main()
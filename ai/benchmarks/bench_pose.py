@@ -0,0 +1,105 @@
+"""
+Frames per second per core of the server-side pose analysis.
+
+Compares PoseSession.analyze at several window sizes, with windows checked
+frame by frame and with the NumPy kernels (the session picks the per-frame
+path up to POSE_SCALAR_MAX_FRAMES), against a per-frame Python port of the
+frontend's checkForm loop doing the same work: every check, visibility and
+the rep streak on every frame. Parsing pose-detection JSON keypoints and
+queueing them, as the WebSocket does, is reported separately.
+Everything runs on one thread, so the numbers are per core.
+
+Run from the ai/ directory:
+    python -m benchmarks.bench_pose --frames 20000
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from app.pose.form_checks import FORM_CHECKS, KEYPOINTS, get_exercise
+from app.pose.session import REP_STREAK_FRAMES, FrameBuffer, PoseSession, parse_frame
+
+EXERCISE = 'push-ups'
+
+
+def synthetic_frames(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    frames = rng.uniform(0, 640, size=(count, len(KEYPOINTS), 3))
+    frames[..., 2] = rng.uniform(0.4, 1.0, size=(count, len(KEYPOINTS)))
+    return frames
+
+
+def calculate_angle(a, b, c):
+    radians = math.atan2(c['y'] - b['y'], c['x'] - b['x']) - math.atan2(a['y'] - b['y'], a['x'] - b['x'])
+    angle = abs(radians * 180.0 / math.pi)
+    return 360 - angle if angle > 180.0 else angle
+
+
+def per_frame_python(keypoint_frames, spec) -> float:
+    """The frontend's checkForm loop, one frame at a time, with every check evaluated on every frame."""
+    streak = reps = 0
+    start = time.perf_counter()
+    for keypoints in keypoint_frames:
+        keypoint_map = {kp['name']: kp for kp in keypoints}
+        visible = all(keypoint_map[name]['score'] >= 0.5 for name in spec['keypoints'])
+        good = visible
+        for check in spec['checks']:
+            points = [keypoint_map[name] for name in check['points'][:3]]
+            angle = calculate_angle(*points)
+            good = (check['range']['min'] <= angle <= check['range']['max']) and good
+        if good:
+            streak += 1
+            if streak == REP_STREAK_FRAMES:
+                reps, streak = reps + 1, 0
+        else:
+            streak = 0
+    return time.perf_counter() - start
+
+
+def windowed(frames: np.ndarray, window: int, scalar_max_frames: int) -> float:
+    session = PoseSession(get_exercise(EXERCISE), scalar_max_frames=scalar_max_frames)
+    timestamps = np.arange(len(frames), dtype=np.float64) * 33.0
+    start = time.perf_counter()
+    for offset in range(0, len(frames), window):
+        session.analyze(frames[offset:offset + window], timestamps[offset:offset + window])
+    return time.perf_counter() - start
+
+
+def through_buffer(keypoint_frames, window: int) -> float:
+    """Parse JSON-shaped keypoints, queue them and analyse in windows, as the WebSocket does."""
+    session = PoseSession(get_exercise(EXERCISE))
+    buffer = FrameBuffer(max_frames=window, window=window)
+    start = time.perf_counter()
+    for index, keypoints in enumerate(keypoint_frames):
+        buffer.append(parse_frame(keypoints), index * 33.0)
+        if len(buffer) == window:
+            session.analyze(*buffer.take())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=20000)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.frames)
+    keypoint_frames = [
+        [{'name': name, 'x': x, 'y': y, 'score': score} for name, (x, y, score) in zip(KEYPOINTS, frame.tolist())]
+        for frame in frames
+    ]
+
+    def report(label: str, seconds: float) -> None:
+        print(f"{label:<34} {args.frames / seconds:>12,.0f} frames/s")
+
+    report("python per frame (frontend port)", per_frame_python(keypoint_frames, FORM_CHECKS[EXERCISE]))
+    for window in (1, 4, 8, 16, 32, 128):
+        report(f"per-frame window={window}", windowed(frames, window, scalar_max_frames=window))
+        report(f"numpy window={window}", windowed(frames, window, scalar_max_frames=0))
+    for window in (1, 8, 32):
+        report(f"parse + buffer + analyze window={window}", through_buffer(keypoint_frames, window))
+
+
+if __name__ == '__main__':
+    main()
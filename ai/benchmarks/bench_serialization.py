@@ -0,0 +1,73 @@
+"""
+Serialization cost per /api/generate-workout response.
+
+Plans are generated once (with and without a cycle phase, which adds the
+phase advice text) and then turned into a response body repeatedly with:
+    encoder          - the previous path: format, then FastAPI's jsonable_encoder + JSONResponse
+    encoder+model    - the same, validated against GenerateWorkoutResponse first
+    orjson           - format, then FastJSONResponse (a plan cache miss)
+    cached body      - FastJSONResponse over the bytes stored in the plan cache (a hit)
+
+Run from the ai/ directory:
+    python -m benchmarks.bench_serialization --iterations 20000
+"""
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import schemas
+from app.main import build_user_data, format_workout_response
+from app.recommendation.engine import WorkoutRecommender
+from app.responses import FastJSONResponse, dumps
+
+PROFILES = {
+    'no phase': {'fitnessGoal': 'General Fitness', 'fitnessLevel': 'Intermediate'},
+    'luteal': {'fitnessGoal': 'Toning', 'fitnessLevel': 'Advanced', 'menstrualCyclePhase': 'luteal'},
+}
+
+
+def time_per_call(fn, iterations: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    recommender = WorkoutRecommender()
+    for label, fields in PROFILES.items():
+        request = schemas.WorkoutRequestFromFrontend(**fields)
+        user_data = build_user_data(request)
+        plan = recommender.generate_workout(user_data)
+        difficulties = recommender.predict_exercise_difficulty_batch(plan['exercises'])
+
+        def format_response():
+            return format_workout_response(request, user_data, plan, difficulties, recommender)
+
+        body = dumps(format_response())
+        paths = {
+            'encoder': lambda: JSONResponse(jsonable_encoder(format_response())).body,
+            'encoder+model': lambda: JSONResponse(
+                jsonable_encoder(schemas.GenerateWorkoutResponse(**format_response()))
+            ).body,
+            'orjson': lambda: FastJSONResponse(format_response()).body,
+            'cached body': lambda: FastJSONResponse(body).body,
+        }
+
+        print(f"{label} ({len(plan['exercises'])} exercises, {len(body)} bytes)")
+        baseline = None
+        for name, fn in paths.items():
+            seconds = time_per_call(fn, args.iterations)
+            baseline = baseline or seconds
+            print(f"  {name:<15} {seconds * 1e6:>8.1f} us/response  {baseline / seconds:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Per-request latency of the /api/generate-workout recommender work, comparing a
+WorkoutRecommender built on every request against the shared process-wide one.
+
+Run from the ai/ directory:
+    python -m benchmarks.bench_shared_recommender --requests 200
+"""
+import argparse
+import statistics
+import time
+
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.provider import RecommenderProvider
+
+USER_DATA = {
+    'fitness_goal': 'Muscle Gain',
+    'cycle_phase': 'follicular',
+    'fitness_level': 2,
+    'available_equipment': [],
+    'user_metrics': {'fitness_level': 2, 'experience_level': 'intermediate'},
+}
+
+
+def handle_request(recommender: WorkoutRecommender) -> None:
+    """The recommender work done by one /api/generate-workout call."""
+    result = recommender.generate_workout(dict(USER_DATA))
+    for exercise in result.get('exercises', []):
+        recommender.predict_exercise_difficulty(exercise)
+
+
+def run(label: str, get_recommender, requests: int) -> None:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        handle_request(get_recommender())
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<24} n={requests:<5} mean={statistics.mean(samples):8.2f} ms  "
+        f"p50={statistics.median(samples):8.2f} ms  p99={p99:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    run('per-request (before)', WorkoutRecommender, args.requests)
+
+    provider = RecommenderProvider()
+    provider.warm()
+    run('shared (after)', provider.get, args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Import-to-ready time of the AI service, measured in fresh interpreter processes
+(what a cold start or a worker respawn pays).
+
+Each run reports:
+    import  - `import app.main`
+    ready   - lifespan startup finished (tables created, recommender warmed)
+    first   - latency of the first /api/generate-workout request
+
+The database is a throwaway SQLite file. Run from the ai/ directory:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    ready = time.perf_counter()
+    client.post("/api/generate-workout", json={"fitnessGoal": "Toning"})
+    first = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - start,
+    "ready": ready - start,
+    "first": first - ready,
+}))
+"""
+
+
+def run_once(db_path: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", CHILD],
+        env=env, check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [run_once(os.path.join(tmp, f"startup{i}.db")) for i in range(args.runs)]
+
+    for key in ("import", "ready", "first"):
+        values = [run[key] * 1000 for run in runs]
+        print(
+            f"{key:<7} median={statistics.median(values):8.1f} ms  "
+            f"min={min(values):8.1f} ms  max={max(values):8.1f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
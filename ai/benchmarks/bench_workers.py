@@ -0,0 +1,156 @@
+"""
+Memory per worker process of the AI service, for the ways workers can get
+their recommender.
+
+    spawn    - every worker imports the app and builds the recommender itself
+               (uvicorn --workers: each worker is a fresh interpreter)
+    preload  - spawned workers memory-map a preload bundle (PRELOAD_DIR) and
+               never load the forest or scikit-learn
+    fork     - one master builds the recommender, calls prepare_for_fork() and
+               forks the workers (gunicorn --preload style)
+
+For each mode N workers are started, each builds and warms the recommender
+(what the lifespan does), then their Rss/Pss/Private_* are read from
+/proc/<pid>/smaps_rollup. Pss splits shared pages between the processes
+mapping them, so its sum is the memory the workers actually cost together.
+Linux only. Run from the ai/ directory:
+
+    python -m benchmarks.bench_workers --workers 4
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Builds and warms the recommender like the lifespan, reports, then waits for stdin to close
+WORKER = r"""
+import os, sys, json, time
+start = time.perf_counter()
+import app.main
+app.main.recommender_provider.warm()
+print(json.dumps({"pid": os.getpid(), "ready": time.perf_counter() - start,
+                  "sklearn": "sklearn" in sys.modules}), flush=True)
+sys.stdin.read()
+"""
+
+# Builds the recommender once, then forks the workers; each child reports and waits.
+# Reports go out in a single write each, so lines from the processes never interleave.
+FORK_MASTER = r"""
+import os, sys, json, time
+def report(**fields):
+    os.write(1, (json.dumps(fields) + "\n").encode())
+start = time.perf_counter()
+import app.main
+from app.recommendation.preload import prepare_for_fork
+prepare_for_fork(app.main.recommender_provider)
+for _ in range(int(sys.argv[1])):
+    forked = time.perf_counter()
+    if os.fork() == 0:
+        app.main.recommender_provider.warm()
+        report(pid=os.getpid(), ready=time.perf_counter() - forked, sklearn="sklearn" in sys.modules)
+        sys.stdin.read()
+        os._exit(0)
+report(pid=os.getpid(), master=True, ready=time.perf_counter() - start)
+sys.stdin.read()
+"""
+
+MEMORY_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def read_memory(pid: int) -> dict:
+    """Memory fields (kB) from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            name, _, rest = line.partition(':')
+            if name in MEMORY_FIELDS:
+                values[name] = int(rest.split()[0])
+    return values
+
+
+def start(code: str, args, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, '-c', code, *args],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        env=env, text=True,
+    )
+
+
+def run_mode(label: str, workers: int, env: dict) -> None:
+    if label == 'fork':
+        processes = [start(FORK_MASTER, [str(workers)], env)]
+        expected = workers + 1
+    else:
+        processes = [start(WORKER, [], env) for _ in range(workers)]
+        expected = workers
+
+    try:
+        reports = []
+        # Forked children share the master's stdout pipe
+        while len(reports) < expected:
+            for process in processes:
+                line = process.stdout.readline()
+                if not line:
+                    raise RuntimeError(f"{label}: a worker exited before reporting")
+                reports.append(json.loads(line))
+                if len(reports) == expected:
+                    break
+        # Let lazy page faults and the listener threads settle
+        time.sleep(0.5)
+
+        master = [report for report in reports if report.get('master')]
+        children = [report for report in reports if not report.get('master')]
+        memory = [read_memory(report['pid']) for report in children]
+        totals = {field: sum(values[field] for values in memory) / 1024 for field in MEMORY_FIELDS}
+        private = totals['Private_Clean'] + totals['Private_Dirty']
+        ready = max(report['ready'] for report in children)
+        print(
+            f"{label:<8} workers={workers}  rss/worker={totals['Rss'] / workers:6.1f} MB  "
+            f"pss/worker={totals['Pss'] / workers:6.1f} MB  private/worker={private / workers:6.1f} MB  "
+            f"pss total={totals['Pss']:6.1f} MB  ready={ready * 1000:7.1f} ms  "
+            f"sklearn={'yes' if any(report['sklearn'] for report in children) else 'no'}"
+        )
+        if master:
+            master_memory = read_memory(master[0]['pid'])
+            print(f"{'':<8} master     rss={master_memory['Rss'] / 1024:6.1f} MB  "
+                  f"pss={master_memory['Pss'] / 1024:6.1f} MB  built in {master[0]['ready'] * 1000:.1f} ms")
+    finally:
+        for process in processes:
+            process.stdin.close()
+        for process in processes:
+            process.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ai-workers-')
+    bundle_dir = os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else workdir, f"ai-preload-{os.getpid()}")
+    env = {
+        **os.environ,
+        'PYTHONPATH': os.getcwd(),
+        'DATABASE_URL': f"sqlite:///{workdir}/bench.db",
+        'RETRAIN_ENABLED': 'false',
+    }
+    env.pop('PRELOAD_DIR', None)
+    try:
+        subprocess.run(
+            [sys.executable, '-m', 'app.recommendation.preload', bundle_dir],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        run_mode('spawn', args.workers, env)
+        run_mode('preload', args.workers, {**env, 'PRELOAD_DIR': bundle_dir})
+        run_mode('fork', args.workers, env)
+    finally:
+        shutil.rmtree(bundle_dir, ignore_errors=True)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Micro-benchmarks of the recommendation engine over synthetic catalogs.
+
+Each case is timed call by call (per-call setup, such as building a fresh base
+plan for _finalize_plan, is not timed) and reported as p50/p99/mean. A second,
+shorter pass under tracemalloc records the peak memory a call allocates.
+
+Catalogs are generated from the built-in library's vocabularies (types,
+muscles, equipment, phases), so filters and masks behave as in production.
+
+Run from the ai/ directory:
+    python -m benchmarks.engine_suite run --output results.json
+    python -m benchmarks.engine_suite run --sizes 16 1024 --output new.json --baseline results.json
+    python -m benchmarks.engine_suite compare results.json new.json --threshold 0.15
+
+compare (and run with --baseline) exits with status 1 when a case's p50 or
+allocation peak grew by more than the threshold. Only compare results taken
+on the same machine.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.recommendation import utils
+from app.recommendation.catalog import PHASES
+from app.recommendation.engine import WorkoutRecommender
+
+DEFAULT_SIZES = (16, 128, 1024, 8192, 50000)
+
+PROFILES = [
+    {'fitness_goal': 'Weight Loss', 'cycle_phase': 'menstrual', 'fitness_level': 1},
+    {'fitness_goal': 'Muscle Gain', 'cycle_phase': 'ovulation', 'fitness_level': 5},
+    {'fitness_goal': 'General Fitness', 'cycle_phase': None, 'fitness_level': 3},
+    {'fitness_goal': 'Toning', 'cycle_phase': 'luteal', 'fitness_level': 2, 'available_equipment': ['dumbbells']},
+    {'fitness_goal': 'Endurance', 'cycle_phase': 'follicular', 'fitness_level': 4},
+]
+for _profile in PROFILES:
+    _profile['user_metrics'] = {'fitness_level': _profile['fitness_level'], 'experience_level': 'intermediate'}
+
+
+def synthetic_library(size: int, reference: WorkoutRecommender, seed: int = 0) -> Dict[str, List[Dict[str, Any]]]:
+    """A categorised library of `size` random exercises over the reference catalog's vocabularies."""
+    rng = np.random.default_rng(seed)
+    catalog = reference.catalog
+    types, muscles, equipment = list(catalog.types), list(catalog.muscles), list(catalog.equipment)
+
+    library: Dict[str, List[Dict[str, Any]]] = {exercise_type: [] for exercise_type in types}
+    for index in range(size):
+        exercise_type = types[index % len(types)]
+        library[exercise_type].append({
+            'id': index + 1,
+            'name': f"Synthetic {exercise_type} {index + 1}",
+            'difficulty': int(rng.integers(1, 6)),
+            'target_muscles': rng.choice(muscles, size=int(rng.integers(1, 5)), replace=False).tolist(),
+            'equipment_needed': rng.choice(equipment, size=int(rng.integers(0, 3)), replace=False).tolist(),
+            'suitable_for_phases': [phase for phase in PHASES if rng.random() < 0.6],
+            'cardio_intensity': int(rng.integers(1, 6)),
+            'strength_intensity': int(rng.integers(1, 6)),
+            'type': exercise_type,
+        })
+    return library
+
+
+def recommender_class(library: Dict[str, List[Dict[str, Any]]]) -> type:
+    """A WorkoutRecommender that loads the given library instead of the built-in one."""
+    class SyntheticRecommender(WorkoutRecommender):
+        def _load_exercise_library(self):
+            return library
+    return SyntheticRecommender
+
+
+def measure(call: Callable[[Any], Any], setup: Callable[[int], Any], iterations: int,
+            alloc_iterations: int) -> Dict[str, Any]:
+    """Time `iterations` calls of call(setup(i)), then trace allocations over a few more."""
+    call(setup(0))  # warm-up
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        arg = setup(i)
+        start = time.perf_counter_ns()
+        call(arg)
+        samples[i] = time.perf_counter_ns() - start
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(alloc_iterations):
+            arg = setup(i)
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(arg)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    samples /= 1000.0
+    return {
+        'iterations': iterations,
+        'p50_us': float(np.percentile(samples, 50)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'mean_us': float(samples.mean()),
+        'alloc_peak_bytes': int(statistics.median(peaks)) if peaks else None,
+    }
+
+
+def iterations_for(call: Callable[[Any], Any], setup: Callable[[int], Any], budget: float,
+                   max_iterations: int) -> int:
+    """Iterations that fit in `budget` seconds, judged from one timed call."""
+    arg = setup(0)
+    start = time.perf_counter()
+    call(arg)
+    elapsed = max(time.perf_counter() - start, 1e-7)
+    return int(min(max_iterations, max(5, budget / elapsed)))
+
+
+def build_cases(recommender: WorkoutRecommender, cls: type) -> List[Tuple[str, Callable, Callable]]:
+    """(name, call, setup) for every benchmarked entry point."""
+    records = recommender.catalog.records
+    exercise_dicts = [records[i].to_dict() for i in range(min(len(records), 256))]
+
+    def profile(i: int) -> Dict[str, Any]:
+        return PROFILES[i % len(PROFILES)]
+
+    def seeded_profile(i: int) -> Dict[str, Any]:
+        np.random.seed(i)
+        return profile(i)
+
+    def base_plan(i: int) -> Tuple[Dict, Dict]:
+        user_data = seeded_profile(i)
+        return recommender._create_base_plan(user_data), user_data
+
+    def plan_exercises(i: int) -> Tuple[Dict, List]:
+        user_data = profile(i)
+        plan, _ = base_plan(i)
+        return user_data['user_metrics'], plan['exercises']
+
+    return [
+        ('init', lambda _: cls(), lambda i: None),
+        ('create_base_plan', recommender._create_base_plan, seeded_profile),
+        ('finalize_plan', lambda args: recommender._finalize_plan(*args), base_plan),
+        ('generate_workout', recommender.generate_workout, seeded_profile),
+        ('predict_exercise_difficulty', recommender.predict_exercise_difficulty,
+         lambda i: exercise_dicts[i % len(exercise_dicts)]),
+        ('filter_exercises_by_phase', recommender.filter_exercises_by_phase, lambda i: PHASES[i % len(PHASES)]),
+        ('calculate_workout_difficulty', lambda args: utils.calculate_workout_difficulty(*args), plan_exercises),
+    ]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: List[int], budget: float, max_iterations: int, alloc_iterations: int,
+              cases: Optional[List[str]] = None) -> Dict[str, Any]:
+    reference = WorkoutRecommender()
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        cls = recommender_class(synthetic_library(size, reference))
+        recommender = cls()
+        for name, call, setup in build_cases(recommender, cls):
+            if cases and name not in cases:
+                continue
+            iterations = iterations_for(call, setup, budget, max_iterations)
+            result = measure(call, setup, iterations, min(alloc_iterations, iterations))
+            results[f"{name}[{size}]"] = {'case': name, 'size': size, **result}
+            print(f"{name:<30} {size:>6}  p50 {result['p50_us']:>11.1f} us  p99 {result['p99_us']:>11.1f} us"
+                  f"  peak {result['alloc_peak_bytes'] / 1024:>9.1f} KiB  (n={iterations})", flush=True)
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print a comparison table and return the keys that regressed beyond threshold."""
+    regressions = []
+    print(f"{'case':<40} {'p50 base':>11} {'p50 now':>11} {'change':>8} {'alloc change':>13}")
+    for key, now in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            print(f"{key:<40} {'-':>11} {now['p50_us']:>11.1f}      new")
+            continue
+        time_change = now['p50_us'] / base['p50_us'] - 1 if base['p50_us'] else 0.0
+        alloc_change = 0.0
+        if base.get('alloc_peak_bytes') and now.get('alloc_peak_bytes') is not None:
+            alloc_change = now['alloc_peak_bytes'] / base['alloc_peak_bytes'] - 1
+        regressed = time_change > threshold or alloc_change > threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<40} {base['p50_us']:>11.1f} {now['p50_us']:>11.1f} {time_change:>+8.1%} {alloc_change:>+13.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recommendation engine micro-benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the suite")
+    run.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="catalog sizes")
+    run.add_argument('--cases', nargs='+', help="only these cases (e.g. generate_workout init)")
+    run.add_argument('--budget', type=float, default=1.0, help="approximate seconds per case")
+    run.add_argument('--max-iterations', type=int, default=5000)
+    run.add_argument('--alloc-iterations', type=int, default=20, help="calls traced for allocations")
+    run.add_argument('--output', help="write results as JSON")
+    run.add_argument('--baseline', help="compare against this results file")
+    run.add_argument('--threshold', type=float, default=0.15, help="allowed relative growth (0.15 = 15%%)")
+
+    check = commands.add_parser('compare', help="compare two results files")
+    check.add_argument('baseline')
+    check.add_argument('current')
+    check.add_argument('--threshold', type=float, default=0.15, help="allowed relative growth (0.15 = 15%%)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = run_suite(args.sizes, args.budget, args.max_iterations, args.alloc_iterations, args.cases)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    else:
+        baseline, current = load(args.baseline), load(args.current)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
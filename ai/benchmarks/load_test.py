@@ -0,0 +1,338 @@
+"""
+End-to-end load test of /api/generate-workout, /api/sync-user and /api/workout-feedback.
+
+By default the app is started with uvicorn in a child process, against a fresh
+SQLite file in a temporary directory, with background retraining disabled. A
+synthetic population (goals, cycle phases and tracking, fitness and activity
+levels, body metrics, medical conditions, allergies, equipment) is synced
+through /api/sync-users/bulk, and every user gets a few stored workout plans
+so that feedback requests have something to rate.
+
+Each concurrency level then runs for --duration seconds: that many clients
+send requests back to back, picking endpoints by the --mix weights. The
+report gives, per level and endpoint, throughput, latency percentiles and
+the error rate (transport errors and HTTP status >= 400).
+
+Run from the ai/ directory:
+    python -m benchmarks.load_test --users 2000 --concurrency 1 4 16 64 --duration 15
+    python -m benchmarks.load_test --url http://staging:8000 --no-seed --concurrency 8 32
+
+Client and server share the machine in the default mode, so on small hosts
+the client's own CPU use lowers the measured capacity.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+ENDPOINTS = {
+    'generate': ('POST', '/api/generate-workout'),
+    'sync': ('POST', '/api/sync-user'),
+    'feedback': ('POST', '/api/workout-feedback'),
+}
+
+GOALS = {'Weight Loss': 0.3, 'General Fitness': 0.25, 'Toning': 0.2, 'Muscle Gain': 0.15, 'Endurance': 0.1}
+# None: the user does not track a cycle
+PHASES = {None: 0.3, 'menstrual': 0.15, 'follicular': 0.2, 'ovulation': 0.1, 'luteal': 0.25}
+FITNESS_LEVELS = {'Beginner': 0.45, 'Intermediate': 0.4, 'Advanced': 0.15}
+ACTIVITY_LEVELS = {
+    'Sedentary (Little to no exercise)': 0.3,
+    'Lightly Active (1-3 workouts per week)': 0.4,
+    'Moderately Active (4-5 workouts per week)': 0.2,
+    'Very Active (Daily intense workouts)': 0.1,
+}
+DIETS = {None: 0.4, 'omnivore': 0.3, 'vegetarian': 0.15, 'vegan': 0.1, 'keto': 0.05}
+MEDICAL_CONDITIONS = ['asthma', 'hypertension', 'knee injury', 'lower back pain', 'pcos', 'endometriosis', 'anemia']
+ALLERGIES = ['peanuts', 'dairy', 'gluten', 'shellfish', 'soy', 'eggs']
+EQUIPMENT = ['dumbbells', 'kettlebell', 'resistance bands', 'yoga mat', 'jump rope', 'pull-up bar']
+LEVEL_NUMBERS = {'Beginner': 1, 'Intermediate': 3, 'Advanced': 5}
+
+
+def pick(rng: random.Random, weights: Dict[Any, float]) -> Any:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def synthetic_population(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Users with both the /api/sync-user record and the /api/generate-workout request they send."""
+    rng = random.Random(seed)
+    today = date.today()
+    users = []
+    for user_id in range(1, count + 1):
+        goal = pick(rng, GOALS)
+        phase = pick(rng, PHASES)
+        level = pick(rng, FITNESS_LEVELS)
+        equipment = rng.sample(EQUIPMENT, k=rng.choice([0, 0, 1, 2, 3]))
+        request = {
+            'userId': str(user_id),
+            'fitnessGoal': goal,
+            'menstrualCyclePhase': phase,
+            'fitnessLevel': level,
+            'activityLevel': pick(rng, ACTIVITY_LEVELS),
+            'height': round(rng.gauss(166, 8), 1),
+            'weight': round(rng.gauss(68, 12), 1),
+            'age': rng.randint(18, 60),
+            'dietType': pick(rng, DIETS),
+            # Most users report none; some report one or two
+            'medicalConditions': rng.sample(MEDICAL_CONDITIONS, k=rng.choice([0, 0, 0, 0, 1, 1, 2])) or None,
+            'allergies': rng.sample(ALLERGIES, k=rng.choice([0, 0, 0, 1, 2])) or None,
+        }
+        if phase is not None:
+            request['lastPeriodDate'] = (today - timedelta(days=rng.randint(0, 27))).isoformat()
+            request['cycleLength'] = rng.randint(24, 35)
+        users.append({
+            'sync': {
+                'id': user_id,
+                'username': f"loadtest{user_id}",
+                'email': f"loadtest{user_id}@example.com",
+                'fitness_goal': goal,
+                'fitness_level': LEVEL_NUMBERS[level],
+                'available_equipment': equipment,
+            },
+            'request': request,
+        })
+    return users
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir: str, workers: int, retrain: bool) -> Tuple[subprocess.Popen, str, str]:
+    """Start uvicorn on a fresh SQLite database; returns (process, base URL, database URL)."""
+    port = free_port()
+    database_url = f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, RETRAIN_ENABLED='true' if retrain else 'false')
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    return process, f"http://127.0.0.1:{port}", database_url
+
+
+def wait_until_ready(base_url: str, process: Optional[subprocess.Popen], timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(base_url + '/', timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} not ready after {timeout:.0f}s")
+
+
+def seed_workout_plans(database_url: str, users: List[Dict[str, Any]], plans_per_user: int, seed: int) -> List[int]:
+    """Store plans made of built-in exercises for every user; returns their ids."""
+    from sqlalchemy import create_engine, insert, select
+    from app import models
+    from app.recommendation.engine import WorkoutRecommender
+
+    rng = random.Random(seed)
+    records = WorkoutRecommender().catalog.records
+    exercises = [
+        {key: list(value) if isinstance(value, tuple) else value for key, value in record.to_dict().items()}
+        for record in records
+    ]
+    rows = [
+        {
+            'user_id': user['sync']['id'],
+            'exercises': rng.sample(exercises, k=min(5, len(exercises))),
+            'difficulty': round(rng.uniform(1, 5), 2),
+            'completed': False,
+        }
+        for user in users for _ in range(plans_per_user)
+    ]
+
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(models.WorkoutPlan), rows)
+            return list(connection.execute(select(models.WorkoutPlan.id)).scalars())
+    finally:
+        engine.dispose()
+
+
+def seed(client: httpx.Client, database_url: Optional[str], users: List[Dict[str, Any]],
+         plans_per_user: int, random_seed: int) -> List[int]:
+    for start in range(0, len(users), 500):
+        response = client.post('/api/sync-users/bulk', json={'users': [u['sync'] for u in users[start:start + 500]]})
+        response.raise_for_status()
+    if database_url is None or plans_per_user <= 0:
+        return []
+    return seed_workout_plans(database_url, users, plans_per_user, random_seed)
+
+
+def build_request(endpoint: str, rng: random.Random, users: List[Dict[str, Any]],
+                  workout_ids: List[int]) -> Optional[Dict[str, Any]]:
+    user = rng.choice(users)
+    if endpoint == 'generate':
+        return user['request']
+    if endpoint == 'sync':
+        sync = dict(user['sync'], fitness_level=rng.randint(1, 5))
+        return sync
+    if not workout_ids:
+        return None
+    return {
+        'workout_id': rng.choice(workout_ids),
+        'completed_exercises': [],
+        'difficulty_rating': rng.randint(1, 5),
+        'energy_level': rng.randint(1, 10),
+        'feedback': rng.choice([None, "Felt good", "Too hard today", "Could do more"]),
+    }
+
+
+async def run_level(base_url: str, concurrency: int, duration: float, mix: Dict[str, float],
+                    users: List[Dict[str, Any]], workout_ids: List[int], seed: int) -> Dict[str, Any]:
+    """Drive `concurrency` closed-loop clients for `duration` seconds."""
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in mix}
+    errors: Dict[str, int] = {endpoint: 0 for endpoint in mix}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def client_loop(index: int) -> None:
+            rng = random.Random(seed * 100003 + index)
+            while time.perf_counter() < deadline:
+                endpoint = pick(rng, mix)
+                payload = build_request(endpoint, rng, users, workout_ids)
+                if payload is None:
+                    continue
+                method, path = ENDPOINTS[endpoint]
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=payload)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies[endpoint].append(time.perf_counter() - start)
+                errors[endpoint] += failed
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for endpoint, samples in latencies.items():
+        if not samples:
+            continue
+        ms = np.array(samples) * 1000.0
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'throughput_rps': len(samples) / elapsed,
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p90_ms': float(np.percentile(ms, 90)),
+            'p99_ms': float(np.percentile(ms, 99)),
+            'max_ms': float(ms.max()),
+            'error_rate': errors[endpoint] / len(samples),
+        }
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'throughput_rps': total / elapsed,
+        'error_rate': sum(errors.values()) / total if total else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    print(f"\nconcurrency {level['concurrency']}: {level['throughput_rps']:.1f} req/s, "
+          f"{level['error_rate']:.2%} errors")
+    print(f"  {'endpoint':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'errors':>7}")
+    for endpoint, stats in level['endpoints'].items():
+        print(f"  {endpoint:<10} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p90_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} {stats['error_rate']:>7.2%}")
+
+
+def parse_mix(values: List[str]) -> Dict[str, float]:
+    mix = {}
+    for value in values:
+        endpoint, _, weight = value.partition('=')
+        if endpoint not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {endpoint!r}; expected one of {', '.join(ENDPOINTS)}")
+        mix[endpoint] = float(weight or 1)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the AI service")
+    parser.add_argument('--url', help="test a running server instead of starting one")
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn workers of the started server")
+    parser.add_argument('--retrain', action='store_true', help="keep background retraining enabled")
+    parser.add_argument('--users', type=int, default=1000, help="synthetic population size")
+    parser.add_argument('--plans-per-user', type=int, default=3, help="stored plans per user, for feedback")
+    parser.add_argument('--no-seed', action='store_true', help="do not sync users or store plans")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument('--mix', nargs='+', default=['generate=7', 'sync=1', 'feedback=2'],
+                        help="endpoint weights, e.g. generate=7 sync=1 feedback=2")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    users = synthetic_population(args.users, args.seed)
+
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as workdir:
+        process, database_url = None, None
+        base_url = args.url
+        if base_url is None:
+            process, base_url, database_url = start_server(workdir, args.workers, args.retrain)
+        try:
+            wait_until_ready(base_url, process)
+            workout_ids: List[int] = []
+            if not args.no_seed:
+                with httpx.Client(base_url=base_url, timeout=60.0) as client:
+                    workout_ids = seed(client, database_url, users, args.plans_per_user, args.seed)
+            if 'feedback' in mix and not workout_ids:
+                print("No stored plans to rate (--url or --no-seed): skipping feedback requests")
+                mix.pop('feedback')
+
+            levels = []
+            for concurrency in args.concurrency:
+                level = asyncio.run(run_level(base_url, concurrency, args.duration, mix, users, workout_ids, args.seed))
+                print_level(level)
+                levels.append(level)
+        except Exception:
+            if process is not None:
+                with open(os.path.join(workdir, 'server.log')) as f:
+                    sys.stderr.write(f.read()[-4000:])
+            raise
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'url': args.url or 'local uvicorn + SQLite',
+                'users': args.users,
+                'mix': mix,
+                'duration': args.duration,
+                'levels': levels,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
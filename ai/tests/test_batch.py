@@ -0,0 +1,56 @@
+"""
+/api/generate-workouts/batch answers every user with either a plan or an
+error line, even when generating a chunk fails.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app, get_recommender
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.model_store import train_difficulty_model
+
+
+class FailingRecommender(WorkoutRecommender):
+    """Fails any generate_workouts call that includes a 'Broken' goal."""
+
+    def generate_workouts(self, users, rng=None):
+        if any(user['fitness_goal'] == 'Broken' for user in users):
+            raise ValueError("broken profile")
+        return super().generate_workouts(users, rng)
+
+
+@pytest.fixture(scope='module')
+def client():
+    recommender = FailingRecommender(preload_dir=False).with_model(train_difficulty_model()[0], 'test')
+    app.dependency_overrides[get_recommender] = lambda: recommender
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_recommender, None)
+
+
+def post_batch(client, goals):
+    response = client.post('/api/generate-workouts/batch', json={
+        'users': [{'userId': str(i), 'fitnessGoal': goal, 'menstrualCyclePhase': 'follicular'}
+                  for i, goal in enumerate(goals)],
+    })
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_every_user_gets_a_plan(client):
+    lines = post_batch(client, ['Toning', 'Weight Loss', 'Muscle Gain'])
+    assert [line['index'] for line in lines] == [0, 1, 2]
+    assert all('error' not in line and line['workoutPlan'] for line in lines)
+
+
+def test_failed_chunk_falls_back_to_single_profiles(client):
+    lines = post_batch(client, ['Toning', 'Broken', 'Muscle Gain'])
+    assert [line['userId'] for line in lines] == ['0', '1', '2']
+    assert lines[1] == {'index': 1, 'userId': '1', 'error': 'Failed to generate workout plan: broken profile'}
+    assert lines[0]['workoutPlan'] and lines[2]['workoutPlan']
@@ -0,0 +1,67 @@
+"""
+ExerciseCatalog filters must agree with a plain scan of the records, including
+vocabularies that need more than one 64-bit word.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.recommendation.catalog import PHASES, ExerciseCatalog
+from app.recommendation.records import ExerciseRecord
+
+
+def make_catalog(muscle_count: int, equipment_count: int, size: int = 400, seed: int = 0):
+    rng = random.Random(seed)
+    muscles = [f"muscle-{i}" for i in range(muscle_count)]
+    equipment = [f"equipment-{i}" for i in range(equipment_count)]
+    records = [
+        ExerciseRecord(
+            id=i,
+            name=f"exercise-{i}",
+            target_muscles=rng.sample(muscles, rng.randint(1, 4)),
+            equipment_needed=rng.sample(equipment, rng.randint(0, 2)),
+            suitable_for_phases=rng.sample(PHASES, rng.randint(0, 3)),
+            type=rng.choice(['strength', 'cardio', 'flexibility']),
+        )
+        for i in range(size)
+    ]
+    return ExerciseCatalog(records), muscles, equipment
+
+
+def scan(catalog, types, phase, available_equipment, muscles):
+    return np.array([
+        record.type in types
+        and (phase in record.suitable_for_phases or not record.suitable_for_phases)
+        and set(record.equipment_needed) <= set(available_equipment)
+        and bool(set(record.target_muscles) & set(muscles))
+        for record in catalog.records
+    ])
+
+
+@pytest.mark.parametrize('muscle_count, equipment_count', [(20, 8), (64, 65), (150, 130)])
+def test_mask_matches_scan(muscle_count, equipment_count):
+    catalog, muscles, equipment = make_catalog(muscle_count, equipment_count)
+    assert catalog.muscle_bits.shape == (len(catalog), -(-muscle_count // 64))
+
+    rng = random.Random(1)
+    for _ in range(50):
+        types = rng.sample(['strength', 'cardio', 'flexibility'], rng.randint(1, 2))
+        phase = rng.choice(PHASES)
+        available = rng.sample(equipment, rng.randint(0, len(equipment)))
+        wanted = rng.sample(muscles, rng.randint(1, 10))
+        mask = catalog.mask(
+            types=types, phase=phase, available_equipment=available, muscles=wanted, include_unphased=True
+        )
+        np.testing.assert_array_equal(mask, scan(catalog, types, phase, available, wanted))
+
+
+def test_unknown_values_match_nothing():
+    catalog, _, _ = make_catalog(100, 10)
+    assert not catalog.mask(muscles=['not-a-muscle']).any()
+    assert catalog.mask(available_equipment=['not-equipment']).sum() == sum(
+        not record.equipment_needed for record in catalog.records
+    )
@@ -0,0 +1,34 @@
+"""
+The instrumented pool logs like the stock pool: under the sqlalchemy.pool
+namespace, quiet unless echo_pool or that logger's level asks for more.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import logging
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.db_pool import InstrumentedAsyncPool, PoolStats
+
+
+def make_pool(**options):
+    pool = InstrumentedAsyncPool(lambda: None, pool_size=1, **options)
+    pool.stats = PoolStats()
+    return pool
+
+
+def test_pool_logs_under_stock_pool_name():
+    stock = AsyncAdaptedQueuePool(lambda: None)
+    assert make_pool().logger.name == stock.logger.name == "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+    assert make_pool(logging_name="ai").logger.name == "sqlalchemy.pool.impl.AsyncAdaptedQueuePool.ai"
+
+
+def test_recreated_pool_keeps_stats_and_stays_quiet(caplog):
+    pool = make_pool()
+    with caplog.at_level(logging.INFO, logger="app"):
+        recreated = pool.recreate()
+        pool.dispose()
+    assert recreated.stats is pool.stats
+    assert recreated.logger.name == pool.logger.name
+    assert not caplog.records
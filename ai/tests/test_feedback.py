@@ -0,0 +1,66 @@
+"""
+Feedback ratings are range-checked and folded into the per-user and
+per-exercise aggregates; rating a workout again replaces its old rating.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import get_session_factory
+from app.main import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'feedback.db'}")
+    with TestClient(app) as client:
+        yield client
+
+
+def add_workouts(client, count):
+    async def add():
+        async with get_session_factory()() as db:
+            user = models.User(username='rater', email='rater@example.com', hashed_password='x')
+            workouts = [
+                models.WorkoutPlan(user=user, exercises=[{'name': 'Squat'}, {'name': 'Plank'}])
+                for _ in range(count)
+            ]
+            db.add_all(workouts)
+            await db.commit()
+            return user.id, [workout.id for workout in workouts]
+    return client.portal.call(add)
+
+
+def rate(client, workout_id, rating):
+    return client.post('/api/workout-feedback', json={
+        'workout_id': workout_id, 'completed_exercises': [], 'difficulty_rating': rating,
+        'energy_level': 5, 'feedback': None,
+    })
+
+
+@pytest.mark.parametrize('rating', [0, 6])
+def test_out_of_range_rating_is_rejected(client, rating):
+    _, (workout_id,) = add_workouts(client, 1)
+    assert rate(client, workout_id, rating).status_code == 422
+
+
+def test_rerating_replaces_the_old_rating(client):
+    user_id, (first, second) = add_workouts(client, 2)
+    assert rate(client, first, 4).status_code == 200
+    assert rate(client, second, 2).status_code == 200
+    before = client.get(f'/api/feedback-stats/users/{user_id}').json()
+    assert (before['rating_count'], before['mean_rating'], before['last_rating']) == (2, 3.0, 2)
+    assert before['recent_rating'] == pytest.approx(4 * 0.7 + 2 * 0.3)
+
+    assert rate(client, second, 5).status_code == 200
+    after = client.get(f'/api/feedback-stats/users/{user_id}').json()
+    # Count unchanged, sum adjusted (4 + 5), EWMA untouched by the re-rating
+    assert (after['rating_count'], after['mean_rating'], after['last_rating']) == (2, 4.5, 5)
+    assert after['rating_variance'] == pytest.approx((16 + 25) / 2 - 4.5 ** 2)
+    assert after['recent_rating'] == before['recent_rating']
+
+    squat = client.get('/api/feedback-stats/exercises/Squat').json()
+    assert (squat['rating_count'], squat['mean_rating']) == (2, 4.5)
@@ -0,0 +1,52 @@
+"""
+The compiled difficulty table must answer exactly like the forest it was
+compiled from, and hand anything outside its domain back to the forest.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.lookup import FEATURE_BOUNDS, compile_difficulty_table, feature_domain
+from app.recommendation.model_store import train_difficulty_model
+
+
+@pytest.fixture(scope='module')
+def model():
+    return train_difficulty_model()[0]
+
+
+@pytest.fixture(scope='module')
+def recommender(model):
+    return WorkoutRecommender(preload_dir=False).with_model(model, 'test')
+
+
+def test_table_matches_forest_over_whole_domain(model):
+    table = compile_difficulty_table(model)
+    np.testing.assert_array_equal(table.table.ravel(), model.predict(feature_domain()))
+
+
+def test_single_lookup_matches_forest(model):
+    table = compile_difficulty_table(model)
+    rows = feature_domain()
+    predictions = model.predict(rows)
+    for row, expected in zip(rows.tolist(), predictions):
+        assert table.lookup(row) == expected
+
+
+def test_out_of_range_rows_fall_back_to_forest(model, recommender):
+    too_many_muscles = [f"muscle-{i}" for i in range(FEATURE_BOUNDS[0] + 2)]
+    exercises = [
+        {'target_muscles': too_many_muscles, 'equipment_needed': [], 'cardio_intensity': 2, 'strength_intensity': 4},
+        {'target_muscles': ['legs'], 'equipment_needed': [], 'cardio_intensity': 9, 'strength_intensity': 1},
+        {'target_muscles': ['core', 'back'], 'equipment_needed': ['mat'], 'cardio_intensity': 1, 'strength_intensity': 2},
+    ]
+    features = [recommender.get_exercise_features(exercise) for exercise in exercises]
+    assert recommender.difficulty_table.lookup(features[0]) is None
+    assert recommender.difficulty_table.lookup(features[1]) is None
+
+    expected = [int(value) for value in model.predict(np.array(features))]
+    assert [recommender.predict_exercise_difficulty(exercise) for exercise in exercises] == expected
+    assert recommender.predict_exercise_difficulty_batch(exercises) == expected
@@ -0,0 +1,110 @@
+"""
+PlanCache hits, misses, expiry and eviction, and the model version in the
+key /api/generate-workout uses.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import itertools
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.model_store import train_difficulty_model
+from app.recommendation.plan_cache import PlanCache, profile_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**options):
+    clock = Clock()
+    return PlanCache(clock=clock, **{'variants': 1, **options}), clock
+
+
+def counter():
+    values = itertools.count()
+    return lambda: next(values)
+
+
+def test_miss_then_hit():
+    cache, _ = make_cache()
+    build = counter()
+    assert cache.get_or_build('a', build) == 0
+    assert cache.get_or_build('a', build) == 0
+    assert cache.get_or_build('b', build) == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_pool_fills_before_hits():
+    cache, _ = make_cache(variants=3)
+    build = counter()
+    assert [cache.get_or_build('a', build) for _ in range(3)] == [0, 1, 2]
+    assert {cache.get_or_build('a', build) for _ in range(20)} <= {0, 1, 2}
+    assert (cache.hits, cache.misses) == (20, 3)
+
+
+def test_entries_expire_after_ttl():
+    cache, clock = make_cache(ttl_seconds=10)
+    build = counter()
+    cache.get_or_build('a', build)
+    clock.now = 9.9
+    assert cache.get_or_build('a', build) == 0
+    # The TTL runs from when the entry was built, not from its last use
+    clock.now = 10.0
+    assert cache.get_or_build('a', build) == 1
+    assert cache.expirations == 1
+
+
+def test_least_recently_used_key_is_evicted():
+    cache, _ = make_cache(max_entries=2)
+    build = counter()
+    cache.get_or_build('a', build)
+    cache.get_or_build('b', build)
+    cache.get_or_build('a', build)  # 'b' is now the least recently used
+    cache.get_or_build('c', build)
+    assert cache.evictions == 1
+    assert cache.get_or_build('a', build) == 0
+    assert cache.get_or_build('b', build) == 3
+
+
+def test_disabled_cache_always_builds():
+    cache, _ = make_cache(max_entries=0)
+    build = counter()
+    assert [cache.get_or_build('a', build) for _ in range(3)] == [0, 1, 2]
+    assert cache.stats()['entries'] == 0
+
+
+def test_profile_key_ignores_equipment_order_and_other_fields():
+    user = {'fitness_goal': 'Toning', 'cycle_phase': 'luteal', 'fitness_level': 2,
+            'available_equipment': ['mat', 'dumbbells'], 'user_metrics': {'experience_level': 1, 'weight': 60}}
+    same = {**user, 'available_equipment': ['dumbbells', 'mat'], 'user_metrics': {'experience_level': 1, 'weight': 90}}
+    assert profile_key(user) == profile_key(same)
+    assert profile_key(user) != profile_key({**user, 'cycle_phase': 'follicular'})
+
+
+def test_swapped_model_does_not_serve_cached_plans(monkeypatch):
+    base = WorkoutRecommender(preload_dir=False)
+    model = train_difficulty_model()[0]
+    recommenders = {'v1': base.with_model(model, 'v1'), 'v2': base.with_model(model, 'v2')}
+    current = ['v1']
+    monkeypatch.setattr(main, 'plan_cache', PlanCache(variants=1))
+    main.app.dependency_overrides[main.get_recommender] = lambda: recommenders[current[0]]
+    try:
+        client = TestClient(main.app)
+        request = {'fitnessGoal': 'Toning', 'menstrualCyclePhase': 'luteal'}
+        first = client.post('/api/generate-workout', json=request).json()
+        assert client.post('/api/generate-workout', json=request).json() == first
+        current[0] = 'v2'
+        swapped = client.post('/api/generate-workout', json=request).json()
+    finally:
+        main.app.dependency_overrides.pop(main.get_recommender, None)
+
+    assert (first['modelVersion'], swapped['modelVersion']) == ('v1', 'v2')
+    assert main.plan_cache.stats()['entries'] == 2
@@ -0,0 +1,64 @@
+"""
+Malformed pose frames are rejected with an error reply, and the stream keeps
+going.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.pose.form_checks import KEYPOINTS
+from app.pose.session import parse_frame, parse_timestamp
+
+TRIPLES = [[0.5, 0.5, 0.9]] * len(KEYPOINTS)
+
+
+def test_parse_frame_accepts_both_shapes():
+    frame = parse_frame([{'name': KEYPOINTS[1], 'x': 1, 'y': 2, 'score': 0.8}])
+    np.testing.assert_array_equal(frame[1], [1, 2, 0.8])
+    assert frame[0, 2] == 0.0 and np.isnan(frame[0, 0])
+    np.testing.assert_array_equal(parse_frame(TRIPLES), np.array(TRIPLES))
+
+
+@pytest.mark.parametrize('keypoints', [
+    [{'name': KEYPOINTS[0], 'x': 1, 'y': 1}, 5],
+    [{'name': KEYPOINTS[0], 'x': 1, 'y': 1}, [0.5, 0.5, 0.9]],
+    [[0.5, 0.5, 0.9], {'name': KEYPOINTS[0], 'x': 1, 'y': 1}],
+    [{'name': KEYPOINTS[0], 'x': 'left', 'y': 1}],
+    {'name': KEYPOINTS[0]},
+])
+def test_parse_frame_rejects_mixed_or_malformed_keypoints(keypoints):
+    with pytest.raises((ValueError, TypeError)):
+        parse_frame(keypoints)
+
+
+@pytest.mark.parametrize('value', ['abc', '12', True, [1], {}, float('nan'), float('inf')])
+def test_parse_timestamp_rejects_non_numbers(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+
+def test_parse_timestamp_accepts_numbers_and_none():
+    assert parse_timestamp(None) is None
+    assert parse_timestamp(1200) == 1200.0
+    assert parse_timestamp(16.5) == 16.5
+
+
+@pytest.mark.parametrize('frame', [
+    {'keypoints': TRIPLES, 't': 'abc'},
+    {'keypoints': [{'name': KEYPOINTS[0], 'x': 1, 'y': 1}, 5], 't': 0},
+    {'frames': [{'keypoints': TRIPLES, 't': 0}, {'keypoints': TRIPLES, 't': [1]}]},
+])
+def test_invalid_frame_gets_error_and_session_stays_open(frame):
+    with TestClient(app).websocket_connect('/ws/pose/push-ups') as websocket:
+        websocket.send_text(json.dumps(frame))
+        assert websocket.receive_json()['error'].startswith('Invalid frame:')
+
+        websocket.send_text(json.dumps({'keypoints': TRIPLES, 't': 33}))
+        result = websocket.receive_json()
+        assert 'error' not in result and result['dropped'] == 0
@@ -0,0 +1,53 @@
+"""
+A recommender built from a preload bundle matches one built from the artifact,
+loads the forest from the artifact only on demand, and never pairs the bundle
+with another model.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.model_store import save_model_artifact, train_difficulty_model
+from app.recommendation.preload import write_bundle
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    model, fingerprint = train_difficulty_model()
+    path = tmp_path / 'difficulty_model.joblib'
+    save_model_artifact(model, fingerprint, path)
+    return path
+
+
+@pytest.fixture
+def bundle_dir(model_path, tmp_path):
+    directory = tmp_path / 'bundle'
+    write_bundle(WorkoutRecommender(model_path=model_path, preload_dir=False), directory)
+    return directory
+
+
+def test_preloaded_recommender_matches_artifact(model_path, bundle_dir):
+    built = WorkoutRecommender(model_path=model_path, preload_dir=False)
+    preloaded = WorkoutRecommender(model_path=model_path, preload_dir=bundle_dir)
+    assert preloaded.catalog.preloaded and preloaded._difficulty_model is None
+    assert preloaded.model_version == built.model_version
+    assert preloaded.predicted_difficulty == built.predicted_difficulty
+
+    # The forest is read from the artifact on first use
+    rows = np.array([built.get_exercise_features(record) for record in built.catalog.records])
+    np.testing.assert_array_equal(preloaded.difficulty_model.predict(rows), built.difficulty_model.predict(rows))
+
+
+def test_replaced_artifact_is_not_paired_with_the_bundle(model_path, bundle_dir):
+    preloaded = WorkoutRecommender(model_path=model_path, preload_dir=bundle_dir)
+    model, _ = train_difficulty_model()
+    save_model_artifact(model, 'other', model_path)
+
+    # Built before the artifact was replaced: the lazy load refuses the new model
+    with pytest.raises(RuntimeError):
+        preloaded.difficulty_model
+    # Built after: the stale bundle is ignored
+    assert not WorkoutRecommender(model_path=model_path, preload_dir=bundle_dir).catalog.preloaded
@@ -0,0 +1,66 @@
+"""
+Programs train on the weekdays of the user's level, return exercises in the
+/api/generate-workout shape and reuse the days whose inputs did not change.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.model_store import train_difficulty_model
+from app.recommendation.program import TRAINING_DAYS, ProgramScheduler
+from app.schemas import WorkoutExerciseOut, transform_fitness_level
+
+START = date(2025, 3, 3)  # a Monday
+
+
+@pytest.fixture(scope='module')
+def recommender():
+    return WorkoutRecommender(preload_dir=False).with_model(train_difficulty_model()[0], 'test')
+
+
+@pytest.fixture
+def scheduler(recommender):
+    return ProgramScheduler(lambda: recommender)
+
+
+def user(level='Intermediate'):
+    fitness_level = transform_fitness_level(level)
+    return {'fitness_goal': 'Toning', 'fitness_level': fitness_level, 'available_equipment': [],
+            'user_metrics': {'fitness_level': fitness_level, 'experience_level': 'intermediate'}}
+
+
+def test_every_fitness_level_has_its_own_schedule(scheduler):
+    levels = {transform_fitness_level(level) for level in ('Beginner', 'Intermediate', 'Advanced')}
+    assert levels == set(TRAINING_DAYS)
+    sessions = [
+        sum(day['type'] == 'workout' for day in scheduler.build_program(user(level), START)['days'])
+        for level in ('Beginner', 'Intermediate', 'Advanced')
+    ]
+    assert sessions == [4 * len(TRAINING_DAYS[level]) for level in (1, 2, 3)]
+    assert sessions == sorted(set(sessions))
+
+
+def test_day_exercises_have_the_generate_workout_shape(scheduler):
+    program = scheduler.build_program(user(), START, recent_rating=4.5)
+    workouts = [day for day in program['days'] if day['type'] == 'workout']
+    for day in workouts:
+        for exercise, difficulty in zip(day['exercises'], day['exerciseDifficulties']):
+            assert WorkoutExerciseOut(**exercise).model_dump() == exercise
+            assert exercise['intensity'] == f"Level {difficulty}/5"
+
+
+def test_unchanged_days_are_reused(scheduler):
+    last_period = START - timedelta(days=3)
+    first = scheduler.build_program(user(), START, last_period_date=last_period)
+    again = scheduler.build_program(user(), START, last_period_date=last_period)
+    assert (first['regeneratedDays'], again['regeneratedDays']) == (28, 0)
+    assert again['days'] == first['days']
+
+    # A new period log rebuilds the days whose phase moved, and only those
+    moved = scheduler.build_program(user(), START, last_period_date=last_period + timedelta(days=2))
+    changed = sum(a['phase'] != b['phase'] for a, b in zip(first['days'], moved['days']))
+    assert 0 < moved['regeneratedDays'] == changed < 28
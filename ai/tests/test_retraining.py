@@ -0,0 +1,146 @@
+"""
+ModelRetrainer promotes, rejects and rolls back models, and publishes them
+through the artifact the other workers follow.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+import random
+
+import pytest
+
+from app.recommendation.engine import WorkoutRecommender
+from app.recommendation.model_store import load_model_artifact, save_model_artifact, train_difficulty_model
+from app.recommendation.provider import RecommenderProvider
+from app.recommendation.retraining import ModelRetrainer
+
+
+@pytest.fixture(scope='module')
+def base():
+    return WorkoutRecommender(preload_dir=False)
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    model, fingerprint = train_difficulty_model()
+    path = tmp_path / 'difficulty_model.joblib'
+    save_model_artifact(model, fingerprint, path)
+    return path
+
+
+def make_provider(base, model_path):
+    artifact = load_model_artifact(model_path)
+    provider = RecommenderProvider()
+    provider.swap(base.with_model(artifact['model'], artifact['version']))
+    return provider
+
+
+def feedback(recommender, count=300, seed=0):
+    """Rated single-exercise plans, mostly agreeing with the live model."""
+    rng = random.Random(seed)
+    records = recommender.catalog.records
+    return [
+        ([{'id': record.id, 'name': record.name}],
+         min(5, recommender.predicted_difficulty[record.id] + rng.choice([0, 0, 1])))
+        for record in rng.choices(records, k=count)
+    ]
+
+
+@pytest.fixture
+def retrainers():
+    """Started retrainers, stopped (and their leader lock released) after the test."""
+    started = []
+    yield started
+    for retrainer in started:
+        retrainer.stop()
+
+
+def start(retrainers, provider, model_path, ratings=(), **options):
+    retrainer = ModelRetrainer(
+        provider, model_path=model_path, min_new_ratings=10**6, interval_seconds=3600, sync_seconds=3600, **options
+    )
+    retrainer.start()
+    retrainers.append(retrainer)
+    # Buffered only: the worker thread stays asleep, training runs in retrain_once() below
+    for exercises, rating in ratings:
+        retrainer.add_feedback(exercises, rating)
+    return retrainer
+
+
+def test_promoted_model_is_published_to_the_artifact(base, model_path, retrainers):
+    ratings = feedback(base)
+    provider, follower_provider = make_provider(base, model_path), make_provider(base, model_path)
+    leader = start(retrainers, provider, model_path, ratings, holdout_tolerance=1.0)
+    follower = start(retrainers, follower_provider, model_path)
+    assert (leader.leader, follower.leader) == (True, False)
+    previous = provider.get().model_version
+
+    result = leader.retrain_once()
+    assert result['status'] == 'promoted'
+    assert result['ratings'] == len(ratings)
+    assert provider.get().model_version == result['version'] != previous
+    assert load_model_artifact(model_path)['version'] == result['version']
+
+    # Same ratings again: nothing to do
+    assert leader.retrain_once() is None
+    assert follower.sync_from_artifact() == result['version']
+    assert follower_provider.get().model_version == result['version']
+
+
+def test_rejected_model_is_not_published(base, model_path, retrainers):
+    provider = make_provider(base, model_path)
+    leader = start(retrainers, provider, model_path, feedback(base), min_seed_accuracy=1.01)
+    live = provider.get()
+    artifact_version = load_model_artifact(model_path)['version']
+
+    result = leader.retrain_once()
+    assert result['status'] == 'rejected'
+    assert result['reasons']
+    assert provider.get() is live
+    assert load_model_artifact(model_path)['version'] == artifact_version
+    assert leader.rollback() is None
+    assert (leader.promotions, leader.rejections) == (0, 1)
+
+
+def test_rollback_restores_previous_model(base, model_path, retrainers):
+    provider = make_provider(base, model_path)
+    leader = start(retrainers, provider, model_path, feedback(base), holdout_tolerance=1.0)
+    original = provider.get()
+    assert leader.retrain_once()['status'] == 'promoted'
+
+    assert leader.rollback() == original.model_version
+    assert provider.get() is original
+    assert load_model_artifact(model_path)['version'] == original.model_version
+    assert leader.rollback() is None
+
+
+def test_follower_cannot_roll_back(base, model_path, retrainers):
+    leader = start(retrainers, make_provider(base, model_path), model_path, feedback(base), holdout_tolerance=1.0)
+    assert leader.retrain_once()['status'] == 'promoted'
+    follower = start(retrainers, make_provider(base, model_path), model_path)
+    assert follower.leader is False
+    assert follower.rollback() is None
+
+
+def test_nothing_is_trained_without_feedback(base, model_path, retrainers):
+    provider = make_provider(base, model_path)
+    leader = start(retrainers, provider, model_path)
+    live = provider.get()
+    assert leader.retrain_once() is None
+    assert provider.get() is live
+    assert leader.runs == 0
+
+
+def test_unwritable_lock_path_follows_the_artifact(base, model_path, tmp_path, retrainers):
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    retrainer = start(retrainers, make_provider(base, model_path), model_path, lock_path=blocker / 'retrain.lock')
+    assert retrainer.leader is False
+
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('RETRAIN_ENABLED', raising=False)
+    retrainer = ModelRetrainer.from_env(RecommenderProvider())
+    assert not retrainer.enabled
+    retrainer.start()
+    assert retrainer.leader is None
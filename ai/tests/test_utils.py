@@ -0,0 +1,39 @@
+"""
+The vectorised cycle phase functions must give the phase get_cycle_phase
+gives, day by day.
+
+Run from the ai/ directory:
+    python -m pytest tests
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.recommendation.catalog import PHASES
+from app.recommendation.utils import get_cycle_phase, get_cycle_phase_calendar, get_cycle_phases
+
+REFERENCE = datetime(2025, 3, 1, 9, 30)
+# Hours on both sides of the reference time, so rounding down to whole days is covered
+LAST_PERIODS = [REFERENCE - timedelta(days=days, hours=hours) for days in range(0, 70, 3) for hours in (-3, 0, 5)]
+
+
+@pytest.mark.parametrize('cycle_length', [21, 28, 35])
+def test_phases_match_scalar(cycle_length):
+    codes = get_cycle_phases(LAST_PERIODS, cycle_length, REFERENCE)
+    expected = [get_cycle_phase(start, cycle_length, REFERENCE) for start in LAST_PERIODS]
+    assert [PHASES[code] for code in codes] == expected
+
+
+def test_calendar_matches_scalar_day_by_day():
+    lengths = np.resize([21, 26, 28, 31, 35], len(LAST_PERIODS))
+    calendar = get_cycle_phase_calendar(LAST_PERIODS, lengths, days=40, reference_date=REFERENCE)
+    assert calendar.shape == (len(LAST_PERIODS), 40)
+    for row, start, length in zip(calendar, LAST_PERIODS, lengths.tolist()):
+        expected = [get_cycle_phase(start, length, REFERENCE + timedelta(days=day)) for day in range(40)]
+        assert [PHASES[code] for code in row] == expected
+
+
+def test_non_positive_cycle_length_is_rejected():
+    with pytest.raises(ValueError):
+        get_cycle_phases(LAST_PERIODS, 0, REFERENCE)